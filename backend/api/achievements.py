@@ -0,0 +1,163 @@
+import hashlib
+import re
+import threading
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from .jobs import enqueue, register, run_each
+from .models import Achievement, StudentAchievement, StudentStats
+
+# Category mastery needs a few attempts, not one lucky exam
+MASTERY_MIN_ATTEMPTS = 3
+VERSION_KEY = 'achievement_rules_version'
+
+
+class Rule:
+    """A criteria string compiled to a check on a StudentStats row.
+
+    matches() reads a loaded row and costs no queries; students() is the same
+    condition as a filter, used to evaluate every student at once.
+    """
+
+    def __init__(self, field, threshold):
+        self.field = field
+        self.threshold = threshold
+
+    def matches(self, stats):
+        return getattr(stats, self.field) >= self.threshold
+
+    def students(self, queryset):
+        return queryset.filter(**{f'{self.field}__gte': self.threshold})
+
+
+class MasteryRule:
+    def __init__(self, category, percent):
+        self.category = category
+        self.percent = percent
+
+    def matches(self, stats):
+        category = stats.category_stats.get(self.category, {})
+        attempts = category.get('attempts', 0)
+        return attempts >= MASTERY_MIN_ATTEMPTS and category['percentage_sum'] >= self.percent * attempts
+
+    def students(self, queryset):
+        # Category names are JSON keys; KT keeps them out of the lookup syntax
+        attempts = Cast(KT('category_stats__' + self.category + '__attempts'), FloatField())
+        percentage_sum = Cast(KT('category_stats__' + self.category + '__percentage_sum'), FloatField())
+        return queryset.alias(mastery_attempts=attempts, mastery_sum=percentage_sum).filter(
+            mastery_attempts__gte=MASTERY_MIN_ATTEMPTS, mastery_sum__gte=F('mastery_attempts') * self.percent
+        )
+
+
+CRITERIA = (
+    (re.compile(r'complete_first_exam'), lambda: Rule('completed_count', 1)),
+    (re.compile(r'complete_(\d+)_exams?'), lambda n: Rule('completed_count', int(n))),
+    (re.compile(r'score_100_percent'), lambda: Rule('perfect_count', 1)),
+    (re.compile(r'score_100_percent_(\d+)_times'), lambda n: Rule('perfect_count', int(n))),
+    (re.compile(r'streak_(\d+)_days?'), lambda n: Rule('best_streak', int(n))),
+    (re.compile(r'master_(.+)_(\d+)_percent'), lambda category, percent: MasteryRule(category, int(percent))),
+)
+
+
+def parse_criteria(criteria):
+    """Compile an Achievement.criteria string, or None if it is not understood."""
+    for pattern, build in CRITERIA:
+        match = pattern.fullmatch(criteria.strip())
+        if match:
+            return build(*match.groups())
+    return None
+
+
+class RuleCache(threading.local):
+    """Compiled rules of every achievement, per process (and thread).
+
+    A version number in the shared cache, bumped whenever an achievement is
+    saved or deleted, tells other processes to reload.
+    """
+
+    version = None
+    rules = ()
+
+    def get(self):
+        version = cache.get_or_set(VERSION_KEY, 1, None)
+        if version != self.version:
+            self.rules = [
+                (achievement, rule)
+                for achievement in Achievement.objects.order_by('id')
+                if (rule := parse_criteria(achievement.criteria)) is not None
+            ]
+            self.version = version
+        return self.rules
+
+
+rule_cache = RuleCache()
+
+
+def invalidate_rules():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def award_achievements(student_id, stats):
+    """Award every achievement the student's rollup row now satisfies.
+
+    Returns the newly earned achievements; costs one query when nothing is
+    earned and two when something is.
+    """
+    if stats is None:
+        return []
+    earned = set(StudentAchievement.objects.filter(student_id=student_id).values_list('achievement_id', flat=True))
+    new = [achievement for achievement, rule in rule_cache.get() if achievement.pk not in earned and rule.matches(stats)]
+    StudentAchievement.objects.bulk_create(
+        [StudentAchievement(student_id=student_id, achievement=achievement) for achievement in new],
+        ignore_conflicts=True,
+    )
+    return new
+
+
+def backfill_achievement(achievement, batch_size=1000):
+    """Award one achievement to every student who already qualifies.
+
+    The rule runs as a single filter over StudentStats; awards are inserted
+    in batches. Returns the number of students awarded.
+    """
+    rule = parse_criteria(achievement.criteria)
+    if rule is None:
+        return 0
+    student_ids = rule.students(StudentStats.objects.all()).exclude(
+        Q(student__achievements__achievement=achievement)
+    ).values_list('student_id', flat=True)
+
+    awarded = 0
+    batch = []
+    for student_id in student_ids.iterator(chunk_size=batch_size):
+        batch.append(StudentAchievement(student_id=student_id, achievement=achievement))
+        if len(batch) >= batch_size:
+            awarded += len(StudentAchievement.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        awarded += len(StudentAchievement.objects.bulk_create(batch, ignore_conflicts=True))
+    return awarded
+
+
+def enqueue_backfill(achievement):
+    # Keyed on the criteria so that editing them queues a fresh backfill
+    digest = hashlib.sha1(achievement.criteria.encode()).hexdigest()[:16]
+    return enqueue('achievement_backfill', f'achievement_backfill:{achievement.pk}:{digest}', {
+        'achievement_id': achievement.pk,
+    })
+
+
+@register('achievement_backfill')
+def achievement_backfill(jobs):
+    achievements = Achievement.objects.in_bulk([job.payload['achievement_id'] for job in jobs])
+
+    def run(job):
+        achievement = achievements.get(job.payload['achievement_id'])
+        if achievement is not None:
+            backfill_achievement(achievement)
+
+    run_each(jobs, run)
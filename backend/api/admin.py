@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import User, Student, Exam, Question, ExamAttempt, StudentAnswer, Category, Notification, Achievement, StudentAchievement
+from .models import User, Student, Exam, Question, ExamAttempt, StudentAnswer, Category, Notification, Achievement, StudentAchievement, Job, StudentStats, LeaderboardEntry, ExamLeaderboardEntry
+from .search import filter_questions
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -32,6 +33,12 @@ class QuestionAdmin(admin.ModelAdmin):
     list_filter = ('exam', 'category', 'question_type', 'difficulty')
     search_fields = ('question_text',)
     
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index instead of a LIKE scan
+        if not search_term:
+            return queryset, False
+        return filter_questions(queryset, search_term), False
+    
     def get_question_preview(self, obj):
         return obj.question_text[:50] + '...' if len(obj.question_text) > 50 else obj.question_text
     get_question_preview.short_description = 'Question'
@@ -64,3 +71,27 @@ class StudentAchievementAdmin(admin.ModelAdmin):
     list_display = ('student', 'achievement', 'earned_at')
     list_filter = ('achievement', 'earned_at')
     search_fields = ('student__name', 'achievement__name')
+
+@admin.register(StudentStats)
+class StudentStatsAdmin(admin.ModelAdmin):
+    list_display = ('student', 'completed_count', 'percentage_max', 'perfect_count', 'total_time', 'updated_at')
+    search_fields = ('student__name',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('student_name', 'total_points', 'exams_completed', 'average_score', 'updated_at')
+    search_fields = ('student_name',)
+
+@admin.register(ExamLeaderboardEntry)
+class ExamLeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('student_name', 'exam', 'score', 'percentage', 'time_spent')
+    list_filter = ('exam',)
+    search_fields = ('student_name',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'status', 'tries', 'run_after', 'created_at', 'completed_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key',)
+    readonly_fields = ('created_at', 'completed_at', 'claim_token', 'claimed_at', 'last_error')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registers signal receivers and the job queue handlers
+        from . import signals, tasks, notifications, item_analysis  # noqa: F401
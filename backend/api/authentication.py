@@ -0,0 +1,38 @@
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+
+class SubprotocolTokenAuthMiddleware:
+    """Channels middleware setting scope['user'] from the JWT offered as a subprotocol.
+
+    Browsers cannot set headers on a WebSocket, so the client opens it with
+    new WebSocket(url, ['bearer', token]). Unlike a query parameter this
+    keeps the token out of access logs. The consumer accepts with the
+    'bearer' subprotocol, left in scope['token_subprotocol'].
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        subprotocols = scope.get('subprotocols', [])
+        token = subprotocols[1] if len(subprotocols) == 2 and subprotocols[0] == 'bearer' else None
+        scope = dict(
+            scope,
+            user=await database_sync_to_async(user_for_token)(token),
+            token_subprotocol='bearer' if token else None,
+        )
+        return await self.app(scope, receive, send)
+
+
+def user_for_token(token):
+    if token:
+        authentication = JWTAuthentication()
+        try:
+            return authentication.get_user(authentication.get_validated_token(token))
+        except (InvalidToken, AuthenticationFailed):
+            pass
+    return AnonymousUser()
@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import F
+from .models import ExamAttempt, StudentAnswer
+from .papers import paper_question_ids
+
+
+class AttemptAlreadySubmitted(Exception):
+    pass
+
+
+def lock_open_attempt(attempt_id):
+    """Take the attempt's row lock for the current transaction, unless it is completed.
+
+    A no-op UPDATE rather than select_for_update, which SQLite ignores: the
+    write makes autosaves and the submission queue behind each other on
+    every backend. Returns whether the attempt is still open.
+    """
+    return ExamAttempt.objects.filter(pk=attempt_id).exclude(status='completed').update(status=F('status')) > 0
+
+
+def upsert_answers(attempt_id, answers):
+    StudentAnswer.objects.bulk_create(
+        [
+            StudentAnswer(
+                attempt_id=attempt_id,
+                question_id=question_id,
+                selected_answer=answer['selected_answer'],
+                time_taken=answer.get('time_taken', 0),
+            )
+            for question_id, answer in answers.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['attempt', 'question'],
+        update_fields=['selected_answer', 'time_taken'],
+    )
+
+
+def autosave_answers(attempt, answers):
+    """Save answer deltas of an in-progress attempt.
+
+    Deltas are merged per question and written straight to StudentAnswer in
+    one upsert, so every process (and the submission) sees them at once.
+    The status is re-checked under the attempt's lock so that a save racing
+    the submission cannot rewrite graded answers. Returns the number of
+    answers saved; raises AttemptAlreadySubmitted once the attempt is graded.
+    Only questions of the student's own paper are kept.
+    """
+    allowed = set(paper_question_ids(attempt.exam, seed=attempt.student.user_id))
+    deltas = {
+        answer['question_id']: {'selected_answer': answer['selected_answer'], 'time_taken': answer.get('time_taken', 0)}
+        for answer in answers
+        if answer['question_id'] in allowed
+    }
+    if deltas:
+        with transaction.atomic():
+            if not lock_open_attempt(attempt.pk):
+                raise AttemptAlreadySubmitted()
+            upsert_answers(attempt.pk, deltas)
+    return len(deltas)
+
+
+def stored_answers(attempt_id):
+    return [
+        {'question_id': question_id, 'selected_answer': selected_answer, 'time_taken': time_taken}
+        for question_id, selected_answer, time_taken in StudentAnswer.objects.filter(attempt_id=attempt_id).values_list(
+            'question_id', 'selected_answer', 'time_taken'
+        )
+    ]
+
+
+def resume_snapshot(attempt, seed):
+    """Question order and saved answers of an attempt.
+
+    The order comes from the cached paper; the answers are one indexed read.
+    """
+    return {
+        'question_order': paper_question_ids(attempt.exam, seed),
+        'answers': {
+            answer['question_id']: {'selected_answer': answer['selected_answer'], 'time_taken': answer['time_taken']}
+            for answer in stored_answers(attempt.pk)
+        },
+    }
@@ -0,0 +1,145 @@
+import random
+import threading
+from collections import defaultdict
+from django.core.cache import cache
+from django.db import transaction
+from .models import Question
+from .search import index_questions
+
+VERSION_KEY = 'question_bank_version'
+DIFFICULTIES = ('easy', 'medium', 'hard')
+# Copied when a bank question is placed in a generated exam
+CLONED_FIELDS = (
+    'category_id', 'question_type', 'difficulty', 'question_text', 'option_a', 'option_b',
+    'option_c', 'option_d', 'correct_answer', 'explanation', 'marks', 'image',
+)
+
+
+class BlueprintError(Exception):
+    pass
+
+
+def clean_blueprint(blueprint):
+    """Validate a blueprint: a list of {category, difficulty, count} sections.
+
+    category (a Category id) and difficulty may be omitted to mean any.
+    """
+    if not isinstance(blueprint, list) or not blueprint:
+        raise BlueprintError('blueprint must be a non-empty list of sections')
+    sections = []
+    for number, section in enumerate(blueprint, start=1):
+        if not isinstance(section, dict):
+            raise BlueprintError(f'Section {number}: expected an object')
+        category = section.get('category')
+        difficulty = section.get('difficulty')
+        count = section.get('count')
+        if category is not None and not isinstance(category, int):
+            raise BlueprintError(f'Section {number}: category must be a category id')
+        if difficulty is not None and difficulty not in DIFFICULTIES:
+            raise BlueprintError(f'Section {number}: difficulty must be one of {", ".join(DIFFICULTIES)}')
+        if not isinstance(count, int) or count < 1:
+            raise BlueprintError(f'Section {number}: count must be a positive integer')
+        sections.append({'category': category, 'difficulty': difficulty, 'count': count})
+    return sections
+
+
+def build_index(rows):
+    """{(category_id, difficulty): [question ids]} from (id, category_id, difficulty) rows.
+
+    Every question is also filed under (category, None), (None, difficulty)
+    and (None, None) so that sections leaving a field open are one lookup.
+    """
+    index = defaultdict(list)
+    for question_id, category_id, difficulty in rows:
+        for key in ((category_id, difficulty), (category_id, None), (None, difficulty), (None, None)):
+            index[key].append(question_id)
+    return dict(index)
+
+
+def sample_bucket(rng, bucket, count, taken):
+    # Rejection sampling: expected O(count) draws unless the bucket is nearly used up
+    picked = []
+    for _ in range(4 * count + len(taken)):
+        if len(picked) == count:
+            return picked
+        question_id = bucket[rng.randrange(len(bucket))]
+        if question_id not in taken:
+            taken.add(question_id)
+            picked.append(question_id)
+
+    remaining = [question_id for question_id in bucket if question_id not in taken]
+    extra = rng.sample(remaining, count - len(picked))
+    taken.update(extra)
+    return picked + extra
+
+
+def sample_questions(index, sections, seed, multiplier=1):
+    """Question ids for a blueprint, section by section, reproducible from seed.
+
+    A question matching several sections is drawn at most once.
+    """
+    rng = random.Random(seed)
+    taken = set()
+    question_ids = []
+    for number, section in enumerate(sections, start=1):
+        bucket = index.get((section['category'], section['difficulty']), [])
+        count = section['count'] * multiplier
+        available = len(bucket)
+        if available - len(taken) < count:
+            # Only then can earlier sections have used up this one; count exactly
+            available -= sum(1 for question_id in bucket if question_id in taken)
+        if available < count:
+            raise BlueprintError(f'Section {number}: {count} questions needed, {available} available')
+        question_ids += sample_bucket(rng, bucket, count, taken)
+    return question_ids
+
+
+class BankIndex(threading.local):
+    """Bucket index of the unassigned questions, per process (and thread).
+
+    Rebuilt in one query when the bank version in the shared cache moves;
+    question saves, deletes and imports bump it.
+    """
+
+    version = None
+    index = None
+
+    def get(self):
+        version = cache.get_or_set(VERSION_KEY, 1, None)
+        if version != self.version:
+            self.index = build_index(
+                Question.objects.filter(exam__isnull=True).values_list('id', 'category_id', 'difficulty')
+            )
+            self.version = version
+        return self.index
+
+
+bank_index = BankIndex()
+
+
+def invalidate_bank():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def sample_bank(sections, seed, multiplier=1):
+    return sample_questions(bank_index.get(), sections, seed, multiplier)
+
+
+@transaction.atomic
+def generate_exam(serializer, sections, question_ids, variants=False):
+    """Save the exam and copy the sampled bank questions into it.
+
+    The bank keeps its questions. With variants the exam stores the
+    blueprint and every student gets their own draw from the copies.
+    """
+    exam = serializer.save(blueprint=sections if variants else None)
+    bank = Question.objects.in_bulk(question_ids)
+    created = Question.objects.bulk_create([
+        Question(exam=exam, **{field: getattr(bank[question_id], field) for field in CLONED_FIELDS})
+        for question_id in question_ids
+    ])
+    index_questions(created)
+    return exam
@@ -0,0 +1,51 @@
+import hashlib
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def exam_etag(exam, seed=None):
+    # A shuffled paper or blueprint variant is a different representation for every seed
+    seed = seed if exam.shuffle_questions or exam.blueprint else 0
+    return f'"exam-{exam.pk}-{exam.paper_version}-{exam.updated_at.timestamp()}-{seed}"'
+
+
+def exam_list_etag(request, queryset):
+    """Validator for a list of exams, from one aggregate query.
+
+    Besides edits (updated_at) and additions or removals (count), the
+    serialized flags depend on the clock, so the number of exams in each
+    schedule state is part of the tag. Exams only ever move forward from
+    upcoming to running to expired, so equal counts mean no exam moved.
+    """
+    now = timezone.now()
+    state = queryset.order_by().aggregate(
+        count=Count('id'),
+        updated=Max('updated_at'),
+        upcoming=Count('id', filter=Q(start_date__gt=now)),
+        running=Count('id', filter=Q(start_date__lte=now, end_date__gte=now)),
+        expired=Count('id', filter=Q(end_date__lt=now)),
+    )
+    key = repr((request.get_full_path(), request.accepted_renderer.format, sorted(state.items())))
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Authenticated data: browsers may keep it but must revalidate every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(request, etag, build, last_modified=None):
+    """Answer 304 Not Modified when the client's validators still match,
+    otherwise call build() for the full response."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified and int(last_modified.timestamp()))
+    if response is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+from .autosave import autosave_answers, resume_snapshot
+from .blueprints import BlueprintError
+from .grading import grade_attempt, submission_summary, AttemptAlreadySubmitted
+from .models import ExamAttempt
+from .serializers import AnswersSaveSerializer, ExamSubmitSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TICK_SECONDS': 5,
+    'HEARTBEAT_TIMEOUT': 60,
+}
+
+# Close codes in the 4000-4999 range reserved for applications
+UNAUTHENTICATED = 4401
+NOT_FOUND = 4404
+SUBMITTED = 4409
+IDLE = 4408
+# A blueprint exam whose pool can no longer fill the student's paper
+UNAVAILABLE = 4503
+
+
+def exam_channel_setting(name):
+    return getattr(settings, 'EXAM_CHANNEL', {}).get(name, DEFAULTS[name])
+
+
+def attempt_group(attempt_id):
+    return f'attempt_{attempt_id}'
+
+
+def send_to_attempt(attempt_id, message):
+    # Lets the REST views reach the sockets of an attempt; across processes
+    # this needs a shared channel layer, the sockets re-check before grading.
+    # Best effort: the change is already committed, so a layer outage is
+    # logged rather than turned into a 500
+    try:
+        async_to_sync(get_channel_layer().group_send)(attempt_group(attempt_id), message)
+    except Exception:
+        logger.exception('Could not notify the sockets of attempt %s', attempt_id)
+
+
+class ExamAttemptConsumer(AsyncJsonWebsocketConsumer):
+    """One WebSocket per open ExamAttempt at ws/attempts/<id>/, JWT in the bearer subprotocol.
+
+    The server owns the clock: it sends a tick with the remaining seconds
+    every TICK_SECONDS and grades the attempt itself when time runs out.
+    The client sends heartbeats, answer deltas (saved like save-answers),
+    pause, resume and submit. Sockets of the same attempt (several tabs)
+    share a group so a submission closes all of them; the REST pause, resume
+    and submit views message the same group. The database is only touched
+    on connect, on messages and once when the time seems to be up.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(UNAUTHENTICATED)
+            return
+
+        self.attempt = await database_sync_to_async(self.load_attempt)(self.scope['url_route']['kwargs']['attempt_id'], user)
+        if self.attempt is None:
+            await self.close(NOT_FOUND)
+            return
+        if self.attempt.status == 'completed':
+            await self.close(SUBMITTED)
+            return
+        try:
+            state = await database_sync_to_async(self.state)()
+        except BlueprintError:
+            await self.close(UNAVAILABLE)
+            return
+
+        self.group = attempt_group(self.attempt.pk)
+        self.last_seen = time.monotonic()
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept(subprotocol=self.scope.get('token_subprotocol'))
+        await self.send_json(state)
+        self.ticker = asyncio.create_task(self.tick())
+
+    async def disconnect(self, code):
+        ticker = getattr(self, 'ticker', None)
+        if ticker is not None:
+            ticker.cancel()
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    def load_attempt(self, attempt_id, user):
+        return ExamAttempt.objects.select_related('exam__category', 'student').filter(id=attempt_id, student__user=user).first()
+
+    def state(self):
+        now = timezone.now()
+        snapshot = resume_snapshot(self.attempt, seed=self.scope['user'].pk)
+        return {
+            'type': 'state',
+            'attempt_id': self.attempt.pk,
+            'status': self.attempt.status,
+            'question_order': snapshot['question_order'],
+            'answers': snapshot['answers'],
+            'remaining_seconds': self.attempt.remaining_seconds(now),
+            'server_time': now.isoformat(),
+        }
+
+    async def tick(self):
+        while True:
+            now = timezone.now()
+            remaining = self.attempt.remaining_seconds(now)
+            if remaining <= 0:
+                # Paused, resumed or submitted elsewhere without this socket hearing of it?
+                await self.reload()
+                if self.attempt.status == 'completed':
+                    await self.close(SUBMITTED)
+                    return
+                remaining = self.attempt.remaining_seconds(now)
+            if remaining <= 0:
+                await self.submit([], reason='time_up')
+                return
+            if time.monotonic() - self.last_seen > exam_channel_setting('HEARTBEAT_TIMEOUT'):
+                await self.close(IDLE)
+                return
+
+            await self.send_json({
+                'type': 'tick',
+                'status': self.attempt.status,
+                'remaining_seconds': remaining,
+                'server_time': now.isoformat(),
+            })
+            await asyncio.sleep(min(exam_channel_setting('TICK_SECONDS'), max(remaining, 1)))
+
+    async def receive_json(self, content):
+        self.last_seen = time.monotonic()
+        handler = {
+            'heartbeat': self.heartbeat,
+            'answers': self.save_answers,
+            'pause': self.pause,
+            'resume': self.resume,
+            'submit': self.submit_answers,
+        }.get(content.get('type'))
+        if handler is None:
+            await self.send_json({'type': 'error', 'detail': f'Unknown message type {content.get("type")!r}'})
+            return
+        if self.attempt.status == 'completed':
+            await self.send_json({'type': 'error', 'detail': 'Exam attempt already submitted'})
+            return
+        await handler(content)
+
+    async def heartbeat(self, content):
+        await self.send_json({
+            'type': 'heartbeat',
+            'remaining_seconds': self.attempt.remaining_seconds(),
+            'server_time': timezone.now().isoformat(),
+        })
+
+    async def save_answers(self, content):
+        serializer = AnswersSaveSerializer(data={'attempt_id': self.attempt.pk, 'answers': content.get('answers')})
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'detail': serializer.errors})
+            return
+        try:
+            saved = await database_sync_to_async(autosave_answers)(self.attempt, serializer.validated_data['answers'])
+        except AttemptAlreadySubmitted:
+            await self.send_json({'type': 'error', 'detail': 'Exam attempt already submitted'})
+            return
+        except BlueprintError:
+            await self.send_json({'type': 'error', 'detail': 'This exam does not have enough questions for its blueprint'})
+            return
+        await self.send_json({'type': 'saved', 'saved': saved})
+
+    @database_sync_to_async
+    def set_paused(self, paused):
+        if paused:
+            self.attempt.pause()
+        else:
+            self.attempt.resume()
+
+    async def pause(self, content):
+        await self.set_paused(True)
+        await self.channel_layer.group_send(self.group, {'type': 'attempt.status', 'paused': True})
+
+    async def resume(self, content):
+        await self.set_paused(False)
+        await self.channel_layer.group_send(self.group, {'type': 'attempt.status', 'paused': False})
+
+    async def submit_answers(self, content):
+        serializer = ExamSubmitSerializer(data={'attempt_id': self.attempt.pk, 'answers': content.get('answers', [])})
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'detail': serializer.errors})
+            return
+        await self.submit(serializer.validated_data['answers'], reason='submitted')
+
+    @database_sync_to_async
+    def grade(self, answers):
+        try:
+            grade_attempt(self.attempt, answers)
+        except AttemptAlreadySubmitted:
+            # Graded elsewhere (another tab or the REST endpoint) in the meantime
+            self.attempt.refresh_from_db()
+        return submission_summary(self.attempt)
+
+    async def submit(self, answers, reason):
+        try:
+            result = await self.grade(answers)
+        except BlueprintError:
+            await self.send_json({'type': 'error', 'detail': 'This exam does not have enough questions for its blueprint'})
+            await self.close(UNAVAILABLE)
+            return
+        await self.channel_layer.group_send(self.group, {'type': 'attempt.submitted', 'reason': reason, 'result': result})
+
+    @database_sync_to_async
+    def reload(self):
+        self.attempt.refresh_from_db(fields=['status', 'pause_time', 'resume_time', 'paused_seconds'])
+
+    async def attempt_status(self, event):
+        # Another socket or the REST API paused or resumed the attempt; reload the clock
+        await self.reload()
+        await self.send_json({
+            'type': 'tick',
+            'status': self.attempt.status,
+            'remaining_seconds': self.attempt.remaining_seconds(),
+            'server_time': timezone.now().isoformat(),
+        })
+
+    async def attempt_submitted(self, event):
+        self.attempt.status = 'completed'
+        await self.send_json({'type': 'submitted', 'reason': event['reason'], 'result': event['result']})
+        await self.close(SUBMITTED)
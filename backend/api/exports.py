@@ -0,0 +1,81 @@
+import csv
+import json
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import StudentAnswer
+
+RESULT_FIELDS = (
+    'attempt_id', 'exam_title', 'student_name', 'score', 'total_marks', 'percentage',
+    'correct_answers', 'wrong_answers', 'unanswered', 'rank', 'status',
+    'start_time', 'end_time', 'time_spent',
+)
+
+
+def result_row(attempt, exam):
+    return {
+        'attempt_id': attempt.id,
+        'exam_title': exam.title,
+        'student_name': attempt.student.name,
+        'score': attempt.score,
+        'total_marks': exam.total_marks,
+        'percentage': attempt.percentage,
+        'correct_answers': attempt.correct_answers,
+        'wrong_answers': attempt.wrong_answers,
+        'unanswered': attempt.unanswered,
+        'rank': attempt.rank,
+        'status': 'Pass' if attempt.score >= exam.passing_marks else 'Fail',
+        'start_time': attempt.start_time,
+        'end_time': attempt.end_time,
+        'time_spent': attempt.time_spent,
+    }
+
+
+def completed_results(exam):
+    return exam.attempts.filter(status='completed').select_related('student').order_by('id')
+
+
+def iter_results(exam, with_answers=False, chunk_size=1000):
+    """Yield (result row, {question_id: selected_answer}) pairs for an exam.
+
+    Attempts are read with a server-side iterator and their answers fetched
+    with one query per chunk, so memory is bounded by chunk_size.
+    """
+    attempts = completed_results(exam).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(attempts, chunk_size)):
+        answers = {}
+        if with_answers:
+            for attempt_id, question_id, selected in StudentAnswer.objects.filter(
+                attempt_id__in=[attempt.id for attempt in chunk]
+            ).values_list('attempt_id', 'question_id', 'selected_answer').iterator():
+                answers.setdefault(attempt_id, {})[question_id] = selected
+        for attempt in chunk:
+            yield result_row(attempt, exam), answers.get(attempt.id, {})
+
+
+class Echo:
+    # csv.writer only needs write(); returning the line lets us yield it
+    def write(self, value):
+        return value
+
+
+def stream_csv(exam, with_answers=False, chunk_size=1000):
+    writer = csv.writer(Echo())
+    question_ids = list(exam.questions.order_by('id').values_list('id', flat=True)) if with_answers else []
+    yield writer.writerow(RESULT_FIELDS + tuple(f'q{question_id}' for question_id in question_ids))
+    for row, answers in iter_results(exam, with_answers, chunk_size):
+        yield writer.writerow(
+            [row[field] for field in RESULT_FIELDS] + [answers.get(question_id, '') for question_id in question_ids]
+        )
+
+
+def stream_jsonl(exam, with_answers=False, chunk_size=1000):
+    for row, answers in iter_results(exam, with_answers, chunk_size):
+        if with_answers:
+            row['answers'] = answers
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+EXPORTERS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import ExamAttempt, StudentAnswer
+from .tasks import enqueue_post_submit
+from .autosave import AttemptAlreadySubmitted, lock_open_attempt, stored_answers
+from .papers import paper_question_ids
+from .stats import apply_attempt_to_stats
+from .ranking import attempts_ahead_of
+
+
+def load_answer_key(exam):
+    # {question_id: question row} for the whole paper in one query
+    return {
+        question['id']: question
+        for question in exam.questions.values('id', 'correct_answer', 'marks', 'difficulty', 'category__name')
+    }
+
+
+def score_answer_sheet(exam, answer_key, answers):
+    """Score submitted answers in memory against a preloaded answer key.
+
+    Answers for questions that are not part of the exam are ignored and a
+    question answered twice keeps its last answer.
+    """
+    sheet = {}
+    for answer_data in answers:
+        if answer_data['question_id'] in answer_key:
+            sheet[answer_data['question_id']] = answer_data
+
+    graded = []
+    correct_count = 0
+    wrong_count = 0
+    total_score = 0
+
+    for question_id, answer_data in sheet.items():
+        question = answer_key[question_id]
+        marks = question['marks']
+        selected = answer_data['selected_answer']
+        is_correct = question['correct_answer'] == selected
+        marks_obtained = 0
+
+        if is_correct:
+            correct_count += 1
+            marks_obtained = marks
+            total_score += marks
+        else:
+            wrong_count += 1
+            # Apply negative marking if enabled
+            if exam.negative_marking:
+                marks_obtained = -exam.negative_marks
+                total_score -= exam.negative_marks
+
+        graded.append({
+            'question_id': question_id,
+            'selected_answer': selected,
+            'is_correct': is_correct,
+            'time_taken': answer_data.get('time_taken', 0),
+            'marks_obtained': marks_obtained,
+        })
+
+    return {
+        'answers': graded,
+        'score': total_score,
+        'correct_answers': correct_count,
+        'wrong_answers': wrong_count,
+        'total_questions': len(answer_key),
+        'unanswered': len(answer_key) - len(graded),
+    }
+
+
+def grade_attempt(attempt, answers):
+    """Grade an answer sheet and persist it together with the attempt result.
+
+    Answers already autosaved for the attempt are graded together with the
+    submitted ones, which win on conflict. Everything runs under the
+    attempt's lock, so a concurrent autosave either lands before the saved
+    answers are read or is refused. Costs a fixed number of queries
+    regardless of the paper length: the lock, the saved answers, the answer
+    key, the attempt update, a single bulk upsert of the answers, the
+    student's stats rollup and the post-submit job.
+    """
+    exam = attempt.exam
+    with transaction.atomic():
+        # The conditional lock doubles as the guard against grading twice
+        if not lock_open_attempt(attempt.pk):
+            raise AttemptAlreadySubmitted()
+
+        answers = stored_answers(attempt.pk) + list(answers)
+        answer_key = load_answer_key(exam)
+        if exam.blueprint:
+            # Only the questions of this student's variant count
+            variant = set(paper_question_ids(exam, seed=attempt.student.user_id))
+            answer_key = {question_id: question for question_id, question in answer_key.items() if question_id in variant}
+        result = score_answer_sheet(exam, answer_key, answers)
+
+        now = timezone.now()
+        total_score = result['score']
+        percentage = (total_score / exam.total_marks) * 100 if exam.total_marks > 0 else 0
+
+        fields = {
+            'end_time': now,
+            'score': total_score,
+            'percentage': percentage,
+            'total_questions': result['total_questions'],
+            'correct_answers': result['correct_answers'],
+            'wrong_answers': result['wrong_answers'],
+            'unanswered': result['unanswered'],
+            'time_spent': attempt.active_seconds(now),
+            'status': 'completed',
+        }
+        ExamAttempt.objects.filter(pk=attempt.pk).update(**fields)
+
+        StudentAnswer.objects.bulk_create(
+            [StudentAnswer(attempt_id=attempt.pk, **answer) for answer in result['answers']],
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['selected_answer', 'is_correct', 'time_taken', 'marks_obtained'],
+        )
+
+        for field, value in fields.items():
+            setattr(attempt, field, value)
+
+        apply_attempt_to_stats(attempt, answer_key, result['answers'])
+
+        # Points, ranks, achievements and notifications run in the job queue
+        enqueue_post_submit(attempt)
+
+    return attempt
+
+
+def submission_summary(attempt):
+    return {
+        'score': attempt.score,
+        'percentage': attempt.percentage,
+        'correct_answers': attempt.correct_answers,
+        'wrong_answers': attempt.wrong_answers,
+        'unanswered': attempt.unanswered,
+        'total_questions': attempt.total_questions,
+        # Provisional until the post-submit job places the attempt
+        'rank': attempts_ahead_of(attempt).count() + 1,
+    }
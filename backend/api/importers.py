@@ -0,0 +1,204 @@
+import csv
+import io
+import json
+from django.db import DatabaseError, transaction
+from .models import Category, Question
+from .search import index_questions
+from .signals import bump_paper_versions
+from .blueprints import invalidate_bank
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 500
+QUESTION_TYPES = dict(Question.QUESTION_TYPE_CHOICES)
+DIFFICULTIES = dict(Question.DIFFICULTY_CHOICES)
+OPTION_FIELDS = (('A', 'option_a'), ('B', 'option_b'), ('C', 'option_c'), ('D', 'option_d'))
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename, fmt=None):
+    fmt = (fmt or filename.rsplit('.', 1)[-1]).lower()
+    if fmt in ('json', 'ndjson'):
+        fmt = 'jsonl'
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFormatError(f'Unsupported import format {fmt!r}, expected one of {", ".join(IMPORT_FORMATS)}')
+    return fmt
+
+
+def read_rows(stream, fmt):
+    """Yield (row number, row dict or parse error) from a binary stream, one line at a time."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        # Row numbers count the header line, like a spreadsheet
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, row
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f'Invalid JSON: {e}'
+            continue
+        yield number, row if isinstance(row, dict) else 'Each line must be a JSON object'
+
+
+class CategoryCache:
+    """Category name -> id, loaded with one query; missing names are created once."""
+
+    def __init__(self, dry_run=False):
+        self.ids = dict(Category.objects.values_list('name', 'id'))
+        self.dry_run = dry_run
+
+    def resolve(self, name):
+        if name not in self.ids:
+            self.ids[name] = None if self.dry_run else Category.objects.get_or_create(name=name)[0].id
+        return self.ids[name]
+
+
+def text_value(row, field):
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+
+def clean_row(row, categories):
+    """Validate one import row and return Question field values.
+
+    Raises ValueError carrying a {field: message} dict when the row breaks
+    the Question field rules.
+    """
+    errors = {}
+    fields = {
+        'question_text': text_value(row, 'question_text'),
+        'question_type': text_value(row, 'question_type').lower() or 'single',
+        'difficulty': text_value(row, 'difficulty').lower() or 'medium',
+        'explanation': text_value(row, 'explanation') or None,
+    }
+
+    if not fields['question_text']:
+        errors['question_text'] = 'This field is required.'
+    if fields['question_type'] not in QUESTION_TYPES:
+        errors['question_type'] = f'Must be one of {", ".join(QUESTION_TYPES)}.'
+    if fields['difficulty'] not in DIFFICULTIES:
+        errors['difficulty'] = f'Must be one of {", ".join(DIFFICULTIES)}.'
+
+    letters = set()
+    for letter, field in OPTION_FIELDS:
+        value = text_value(row, field)
+        if len(value) > 500:
+            errors[field] = 'Ensure this field has no more than 500 characters.'
+        elif value:
+            letters.add(letter)
+        elif letter in 'AB':
+            errors[field] = 'This field is required.'
+        fields[field] = value or (None if letter in 'CD' else '')
+
+    answer = ''.join(text_value(row, 'correct_answer').upper().replace(',', '').split())
+    if fields['question_type'] == 'true_false':
+        valid = answer in ('A', 'B')
+    elif fields['question_type'] == 'multiple':
+        valid = len(answer) >= 2 and len(set(answer)) == len(answer) and set(answer) <= letters
+        answer = ''.join(sorted(answer))
+    else:
+        valid = len(answer) == 1 and answer in letters
+    if not valid:
+        errors['correct_answer'] = f'{answer or "Empty answer"} is not valid for a {fields["question_type"]} question.'
+    fields['correct_answer'] = answer
+
+    try:
+        fields['marks'] = int(text_value(row, 'marks') or 1)
+        if fields['marks'] < 1:
+            raise ValueError
+    except ValueError:
+        errors['marks'] = 'Must be a positive integer.'
+
+    category = text_value(row, 'category')
+    if category:
+        if len(category) > 100:
+            errors['category'] = 'Ensure this field has no more than 100 characters.'
+        elif not errors:
+            fields['category_id'] = categories.resolve(category)
+
+    if errors:
+        raise ValueError(errors)
+    return fields
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def insert_chunk(chunk, report):
+    numbers, questions = zip(*chunk)
+    try:
+        # A savepoint per chunk: a failing chunk is reported, the rest are kept
+        with transaction.atomic():
+            Question.objects.bulk_create(questions)
+    except DatabaseError as e:
+        for number in numbers:
+            report.add_error(number, {'non_field_errors': str(e)})
+        return
+    index_questions(questions)
+    report.created += len(questions)
+
+
+def import_questions(stream, fmt, exam=None, batch_size=500, dry_run=False):
+    """Stream-import questions from a CSV or JSON Lines file.
+
+    Rows are validated one by one and valid ones are inserted with
+    bulk_create in chunks of batch_size, so memory stays constant whatever
+    the file size. Unknown category names are created. bulk_create skips
+    the Question signals, so the exam paper version (or the bank index) and
+    the search index are updated here instead.
+    """
+    report = ImportReport()
+    categories = CategoryCache(dry_run)
+    chunk = []
+
+    with transaction.atomic():
+        for number, row in read_rows(stream, fmt):
+            if isinstance(row, str):
+                report.add_error(number, {'non_field_errors': row})
+                continue
+            try:
+                fields = clean_row(row, categories)
+            except ValueError as e:
+                report.add_error(number, e.args[0])
+                continue
+
+            if dry_run:
+                report.created += 1
+                continue
+            chunk.append((number, Question(exam=exam, **fields)))
+            if len(chunk) >= batch_size:
+                insert_chunk(chunk, report)
+                chunk = []
+
+        if chunk:
+            insert_chunk(chunk, report)
+        if exam is not None and report.created and not dry_run:
+            bump_paper_versions([exam.pk])
+        elif report.created and not dry_run:
+            invalidate_bank()
+
+    return report.as_dict()
@@ -0,0 +1,229 @@
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from .blueprints import BlueprintError
+from .jobs import enqueue, register, run_each
+from .models import Exam, ExamAttempt, StudentAnswer
+from .papers import paper_question_ids
+
+OPTIONS = ('A', 'B', 'C', 'D')
+# Larger exams are analysed by the job worker instead of inside the request
+INLINE_ATTEMPTS = 2000
+CACHE_SECONDS = 7 * 24 * 60 * 60
+
+# Conventional review thresholds
+TOO_HARD = 0.2
+TOO_EASY = 0.9
+LOW_DISCRIMINATION = 0.2
+
+
+def analysis_key(exam_id):
+    return f'item_analysis:{exam_id}'
+
+
+def analysis_version(exam):
+    # Changes whenever an attempt completes or a question of the paper is edited
+    completed = ExamAttempt.objects.filter(exam=exam, status='completed').order_by().aggregate(
+        count=Count('id'), last=Max('id')
+    )
+    return f'{exam.paper_version}:{completed["count"]}:{completed["last"]}', completed['count']
+
+
+def load_matrix(exam):
+    """Attempts x questions matrices of selected options, correctness and presentation, in one pass over StudentAnswer.
+
+    choices holds 0 for unanswered, 1-4 for A-D and 5 for anything else
+    (multiple-choice combinations). presented marks the questions each
+    attempt's paper showed: all of them, or the student's own variant of a
+    blueprint exam (the questions they answered if it can no longer be drawn).
+    """
+    questions = list(exam.questions.order_by('id').values_list('id', 'correct_answer'))
+    question_ids = np.array([question_id for question_id, _ in questions], dtype=np.int64)
+    attempts = list(
+        ExamAttempt.objects.filter(exam=exam, status='completed').order_by('id').values_list('id', 'student__user_id')
+    )
+    attempt_ids = np.array([attempt_id for attempt_id, _ in attempts], dtype=np.int64)
+
+    rows = StudentAnswer.objects.filter(attempt__exam=exam, attempt__status='completed').values_list(
+        'attempt_id', 'question_id', 'selected_answer', 'is_correct'
+    ).order_by()
+    codes = {option: index for index, option in enumerate(OPTIONS, start=1)}
+    answer_attempts, answer_questions, answer_choices, answer_correct = [], [], [], []
+    for attempt_id, question_id, selected, is_correct in rows.iterator(chunk_size=20000):
+        answer_attempts.append(attempt_id)
+        answer_questions.append(question_id)
+        answer_choices.append(codes.get(selected, 5))
+        answer_correct.append(is_correct)
+
+    choices = np.zeros((len(attempt_ids), len(question_ids)), dtype=np.int8)
+    correct = np.zeros((len(attempt_ids), len(question_ids)), dtype=bool)
+    if answer_attempts and len(question_ids) and len(attempt_ids):
+        answer_questions = np.array(answer_questions, dtype=np.int64)
+        answer_attempts = np.array(answer_attempts, dtype=np.int64)
+        columns = np.searchsorted(question_ids, answer_questions)
+        lines = np.searchsorted(attempt_ids, answer_attempts)
+        # Answers to questions since removed from the paper are dropped, and so
+        # are those of attempts completed after the attempts were read
+        known = (
+            (columns < len(question_ids)) & (question_ids[np.minimum(columns, len(question_ids) - 1)] == answer_questions)
+            & (lines < len(attempt_ids)) & (attempt_ids[np.minimum(lines, len(attempt_ids) - 1)] == answer_attempts)
+        )
+        choices[lines[known], columns[known]] = np.array(answer_choices, dtype=np.int8)[known]
+        correct[lines[known], columns[known]] = np.array(answer_correct, dtype=bool)[known]
+
+    if exam.blueprint:
+        presented = np.zeros((len(attempt_ids), len(question_ids)), dtype=bool)
+        variants = {}
+        for line, (_, user_id) in enumerate(attempts):
+            if user_id not in variants:
+                try:
+                    variant = np.array(paper_question_ids(exam, seed=user_id), dtype=np.int64)
+                    variants[user_id] = np.searchsorted(question_ids, variant[np.isin(variant, question_ids)])
+                except BlueprintError:
+                    # The pool shrank below the blueprint; the papers cannot be redrawn
+                    variants[user_id] = None
+            if variants[user_id] is None:
+                presented[line] = choices[line] > 0
+            else:
+                presented[line, variants[user_id]] = True
+        correct &= presented
+    else:
+        presented = np.ones((len(attempt_ids), len(question_ids)), dtype=bool)
+    return questions, choices, correct, presented
+
+
+def rounded(values):
+    # NaN (undefined statistic) becomes None in the JSON
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+
+def analyse(questions, choices, correct, presented):
+    """Classical test theory statistics of one exam.
+
+    Every item is measured over the attempts whose paper presented it.
+    p-value: share of those attempts answering the item correctly.
+    Discrimination: point-biserial correlation of the item with the rest
+    score (total minus the item), so the item does not correlate with itself.
+    KR-20: internal consistency reliability of the paper. With variants the
+    item variances are averaged over the papers actually sat.
+    """
+    attempts, items = correct.shape
+    scores = correct.sum(axis=1, dtype=np.float64)
+    seen = presented.sum(axis=0)
+    if not attempts:
+        undefined = np.full(items, np.nan)
+        p = discrimination = undefined
+        kr20 = np.nan
+        frequencies = {option: undefined for option in ('omitted',) + OPTIONS}
+    else:
+        shown = presented.astype(np.float64)
+        x = correct.astype(np.float64)
+        rest = (scores[:, None] - x) * shown
+        with np.errstate(invalid='ignore', divide='ignore'):
+            p = x.sum(axis=0) / seen
+            rest_mean = rest.sum(axis=0) / seen
+            covariance = (x * rest).sum(axis=0) / seen - p * rest_mean
+            rest_sd = np.sqrt(np.maximum((rest * rest).sum(axis=0) / seen - rest_mean ** 2, 0))
+            discrimination = covariance / (np.sqrt(p * (1 - p)) * rest_sd)
+        # Items everyone (or no one) got right, or no one saw, have no discrimination
+        discrimination[~np.isfinite(discrimination)] = np.nan
+
+        # Paper length and summed item variance of the paper each attempt sat
+        item_variance = np.nan_to_num(p * (1 - p))
+        paper_items = shown.sum(axis=1).mean()
+        paper_variance = (shown @ item_variance).mean()
+        variance = scores.var()
+        kr20 = (
+            paper_items / (paper_items - 1) * (1 - paper_variance / variance)
+            if paper_items > 1 and variance > 0 else np.nan
+        )
+
+        # Share of the attempts shown each item picking each option, plus omissions
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frequencies = {
+                option: ((choices == code) & presented).sum(axis=0) / seen
+                for code, option in enumerate(('omitted',) + OPTIONS)
+            }
+
+    difficulty = rounded(p)
+    discrimination = rounded(discrimination)
+    option_shares = {option: rounded(share) for option, share in frequencies.items()}
+    report = []
+    for index, (question_id, key) in enumerate(questions):
+        distractors = {option: option_shares[option][index] for option in ('omitted',) + OPTIONS}
+        flags = []
+        if difficulty[index] is not None:
+            if difficulty[index] < TOO_HARD:
+                flags.append('too_hard')
+            elif difficulty[index] > TOO_EASY:
+                flags.append('too_easy')
+        if discrimination[index] is not None:
+            if discrimination[index] < 0:
+                flags.append('negative_discrimination')
+            elif discrimination[index] < LOW_DISCRIMINATION:
+                flags.append('low_discrimination')
+        if key in OPTIONS and distractors[key] is not None and any(
+            (distractors[option] or 0) > distractors[key] for option in OPTIONS if option != key
+        ):
+            flags.append('distractor_beats_key')
+        report.append({
+            'question_id': question_id,
+            'correct_answer': key,
+            'attempts': int(seen[index]),
+            'difficulty_index': difficulty[index],
+            'discrimination': discrimination[index],
+            'option_frequencies': distractors,
+            'flags': flags,
+        })
+
+    return {
+        'attempts': attempts,
+        'questions': items,
+        'mean_score': round(float(scores.mean()), 4) if attempts else None,
+        'score_sd': round(float(scores.std()), 4) if attempts else None,
+        'kr20': None if np.isnan(kr20) else round(float(kr20), 4),
+        'items': report,
+    }
+
+
+def compute_item_analysis(exam):
+    version, _ = analysis_version(exam)
+    analysis = {
+        'exam_id': exam.pk,
+        **analyse(*load_matrix(exam)),
+        'version': version,
+        'computed_at': timezone.now().isoformat(),
+    }
+    cache.set(analysis_key(exam.pk), analysis, CACHE_SECONDS)
+    return analysis
+
+
+def item_analysis(exam):
+    """Cached analysis of an exam and whether it is current.
+
+    A missing or outdated analysis of a small exam is computed inline; for
+    larger exams a job is queued and the previous analysis, if any, is
+    returned in the meantime. Returns (analysis or None, pending).
+    """
+    version, attempts = analysis_version(exam)
+    analysis = cache.get(analysis_key(exam.pk))
+    if analysis is not None and analysis['version'] == version:
+        return analysis, False
+
+    if attempts <= INLINE_ATTEMPTS:
+        return compute_item_analysis(exam), False
+    enqueue('item_analysis', f'item_analysis:{exam.pk}:{version}', {'exam_id': exam.pk})
+    return analysis, True
+
+
+@register('item_analysis')
+def item_analysis_job(jobs):
+    exams = Exam.objects.in_bulk([job.payload['exam_id'] for job in jobs])
+
+    def run(job):
+        exam = exams.get(job.payload['exam_id'])
+        if exam is not None:
+            compute_item_analysis(exam)
+
+    run_each(jobs, run)
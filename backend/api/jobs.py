@@ -0,0 +1,174 @@
+import logging
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'EAGER': False,
+    'WORKERS': 4,
+    'TICK_SECONDS': 1.0,
+    'BATCH_SIZE': 200,
+    'MAX_TRIES': 5,
+    'LEASE_SECONDS': 300,
+}
+
+# kind -> (handler, group_by). A handler receives every claimed job of one
+# group at once, which is what lets a tick coalesce work across jobs.
+HANDLERS = {}
+
+
+def job_setting(name):
+    return getattr(settings, 'JOB_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+def register(kind, group_by=None):
+    def decorator(func):
+        HANDLERS[kind] = (func, group_by)
+        return func
+    return decorator
+
+
+def enqueue(kind, key, payload=None, run_after=None):
+    """Queue a job once per key; enqueueing the same key again is a no-op."""
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                kind=kind,
+                key=key,
+                payload=payload or {},
+                max_tries=job_setting('MAX_TRIES'),
+                run_after=run_after or timezone.now(),
+            )
+    except IntegrityError:
+        return None
+
+    if job_setting('EAGER'):
+        transaction.on_commit(lambda: run_jobs(claim_jobs(job_ids=[job.id])))
+    return job
+
+
+def claim_jobs(limit=None, job_ids=None):
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = Q(status='pending', run_after__lte=now) | Q(
+        status='running', claimed_at__lt=now - timedelta(seconds=job_setting('LEASE_SECONDS'))
+    )
+
+    candidates = Job.objects.filter(due)
+    if job_ids is not None:
+        candidates = candidates.filter(id__in=job_ids)
+    ids = list(candidates.order_by('id').values_list('id', flat=True)[:limit or job_setting('BATCH_SIZE')])
+    if not ids:
+        return []
+
+    # Re-checking the due condition makes the claim safe against other workers
+    Job.objects.filter(due, id__in=ids).update(
+        status='running', claim_token=token, claimed_at=now, tries=F('tries') + 1
+    )
+    return list(Job.objects.filter(claim_token=token, status='running').order_by('id'))
+
+
+def group_jobs(jobs):
+    groups = defaultdict(list)
+    for job in jobs:
+        handler, group_by = HANDLERS.get(job.kind, (None, None))
+        group_key = group_by(job) if group_by else job.id
+        groups[(job.kind, group_key)].append(job)
+    return list(groups.values())
+
+
+class JobLost(Exception):
+    pass
+
+
+def mark_done(job):
+    job.completed_at = timezone.now()
+    updated = Job.objects.filter(pk=job.pk, claim_token=job.claim_token, status='running').update(
+        status='done', completed_at=job.completed_at, last_error=None
+    )
+    if not updated:
+        # The lease expired and another worker re-claimed the job
+        raise JobLost(job.key)
+
+
+def mark_failed(job, error):
+    if job.tries >= job.max_tries:
+        fields = {'status': 'failed'}
+    else:
+        # Exponential backoff: 2s, 4s, 8s, ...
+        fields = {'status': 'pending', 'run_after': timezone.now() + timedelta(seconds=2 ** job.tries)}
+    Job.objects.filter(pk=job.pk, claim_token=job.claim_token).update(last_error=error, **fields)
+
+
+def run_each(jobs, func):
+    # Each job's side effects commit together with its 'done' mark, so a
+    # retried job never applies them twice
+    for job in jobs:
+        try:
+            with transaction.atomic():
+                func(job)
+                mark_done(job)
+        except JobLost:
+            job.completed_at = None
+            logger.warning('Job %s was re-claimed by another worker', job.key)
+        except Exception:
+            logger.exception('Job %s failed', job.key)
+            job.completed_at = None
+            mark_failed(job, traceback.format_exc())
+
+
+def run_group(jobs):
+    kind = jobs[0].kind
+    try:
+        if kind not in HANDLERS:
+            raise LookupError(f'No handler registered for job kind {kind!r}')
+        handler, group_by = HANDLERS[kind]
+        handler(jobs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job group %s failed', [job.key for job in jobs])
+        for job in jobs:
+            if not job.completed_at:
+                mark_failed(job, error)
+
+
+def run_pooled_group(jobs):
+    try:
+        run_group(jobs)
+    finally:
+        close_old_connections()
+
+
+def run_jobs(jobs, pool=None):
+    groups = group_jobs(jobs)
+    if pool is None:
+        for group in groups:
+            run_group(group)
+    else:
+        list(pool.map(run_pooled_group, groups))
+    return len(jobs)
+
+
+def run_worker(workers=None, tick=None, batch_size=None, once=False):
+    workers = workers or job_setting('WORKERS')
+    tick = tick if tick is not None else job_setting('TICK_SECONDS')
+
+    processed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            jobs = claim_jobs(limit=batch_size)
+            processed += run_jobs(jobs, pool)
+            if once:
+                return processed
+            if not jobs:
+                time.sleep(tick)
@@ -0,0 +1,133 @@
+from itertools import islice
+from django.db import transaction
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery
+from .models import Student, ExamAttempt, Job, LeaderboardEntry, ExamLeaderboardEntry
+
+GLOBAL_LEADERBOARD_ORDERING = ('-total_points', 'student_id')
+EXAM_LEADERBOARD_ORDERING = ('-score', 'time_spent', 'attempt_id')
+
+
+def profile_image_url(student):
+    return student.profile_image.url if student.profile_image else None
+
+
+def build_entry(student, exams_completed, average_score):
+    return LeaderboardEntry(
+        student=student,
+        student_name=student.name,
+        profile_image=profile_image_url(student),
+        total_points=student.total_points,
+        exams_completed=exams_completed or 0,
+        average_score=average_score or 0,
+    )
+
+
+def stored_points():
+    # Student.total_points is the only points counter; entries copy it
+    return Subquery(Student.objects.filter(pk=OuterRef('student_id')).values('total_points')[:1])
+
+
+def refresh_student_entry(student):
+    # Full recompute for one student, used when no entry exists yet. Only
+    # attempts already counted (they have an exam leaderboard row) are
+    # included; the rest are still waiting for their post_submit job.
+    totals = ExamAttempt.objects.filter(
+        student=student, status='completed', leaderboard_entry__isnull=False
+    ).aggregate(completed=Count('id'), average=Avg('percentage'))
+    entry = build_entry(student, totals['completed'], totals['average'])
+    LeaderboardEntry.objects.update_or_create(student=student, defaults={
+        field: getattr(entry, field)
+        for field in ('student_name', 'profile_image', 'total_points', 'exams_completed', 'average_score')
+    })
+
+
+@transaction.atomic
+def record_attempt(attempt):
+    """Add a freshly completed attempt to the student's points and both leaderboards.
+
+    The attempt gets its own exam leaderboard row, which also marks it as
+    counted: a repeated call changes nothing and returns False. The global
+    entry is adjusted in place with one UPDATE (running average included)
+    and copies the points from the student row.
+    """
+    student = attempt.student
+    image = profile_image_url(student)
+
+    _, created = ExamLeaderboardEntry.objects.update_or_create(attempt=attempt, defaults={
+        'exam_id': attempt.exam_id,
+        'student_name': student.name,
+        'profile_image': image,
+        'score': attempt.score,
+        'percentage': attempt.percentage,
+        'time_spent': attempt.time_spent,
+    })
+    if not created:
+        return False
+
+    Student.objects.filter(pk=student.pk).update(total_points=F('total_points') + int(attempt.score))
+    updated = LeaderboardEntry.objects.filter(student=student).update(
+        student_name=student.name,
+        profile_image=image,
+        total_points=stored_points(),
+        average_score=(F('average_score') * F('exams_completed') + attempt.percentage) / (F('exams_completed') + 1),
+        exams_completed=F('exams_completed') + 1,
+    )
+    if not updated:
+        student.refresh_from_db(fields=['total_points'])
+        refresh_student_entry(student)
+    return True
+
+
+def sync_student_profile(student):
+    # Name and picture are denormalised into every leaderboard row, points
+    # into the global one
+    image = profile_image_url(student)
+    LeaderboardEntry.objects.filter(student=student).update(
+        student_name=student.name, profile_image=image, total_points=stored_points()
+    )
+    ExamLeaderboardEntry.objects.filter(attempt__student=student).update(student_name=student.name, profile_image=image)
+
+
+def bulk_create_in_batches(model, objs, batch_size):
+    objs = iter(objs)
+    created = 0
+    while batch := list(islice(objs, batch_size)):
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+@transaction.atomic
+def rebuild_leaderboards(batch_size=1000):
+    # Attempts whose post_submit job has not run yet are left for the job to count
+    pending = list(Job.objects.filter(kind='post_submit', status__in=('pending', 'running')).values_list(
+        'payload__attempt_id', flat=True
+    ))
+    counted = Q(exam_attempts__status='completed') & ~Q(exam_attempts__id__in=pending)
+
+    LeaderboardEntry.objects.all().delete()
+    students = Student.objects.annotate(
+        completed=Count('exam_attempts', filter=counted),
+        average=Avg('exam_attempts__percentage', filter=counted),
+    )
+    rebuilt = bulk_create_in_batches(LeaderboardEntry, (
+        build_entry(student, student.completed, student.average)
+        for student in students.iterator(chunk_size=batch_size)
+    ), batch_size)
+
+    ExamLeaderboardEntry.objects.all().delete()
+    attempts = ExamAttempt.objects.filter(status='completed').exclude(id__in=pending).select_related('student')
+    bulk_create_in_batches(ExamLeaderboardEntry, (
+        ExamLeaderboardEntry(
+            exam_id=attempt.exam_id,
+            attempt=attempt,
+            student_name=attempt.student.name,
+            profile_image=profile_image_url(attempt.student),
+            score=attempt.score,
+            percentage=attempt.percentage,
+            time_spent=attempt.time_spent,
+        )
+        for attempt in attempts.iterator(chunk_size=batch_size)
+    ), batch_size)
+
+    return rebuilt
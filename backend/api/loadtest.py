@@ -0,0 +1,257 @@
+import json
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.utils import timezone
+from .jobs import run_worker
+from .leaderboards import build_entry
+from .models import User, Student, Category, Exam, Question, Job, LeaderboardEntry
+from .perf import percentile
+from .search import index_questions
+
+PASSWORD = 'loadtest-password'
+STEP_HEADER = 'X-Loadtest-Step'
+
+
+class Seed:
+    """Students, an exam and a question bank tagged with one run id."""
+
+    def __init__(self, students, questions, bank):
+        self.run_id = uuid.uuid4().hex[:8]
+        prefix = f'loadtest-{self.run_id}'
+        password = make_password(PASSWORD)
+
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=password, role='student')
+            for i in range(students)
+        ])
+        self.students = Student.objects.bulk_create([
+            Student(user=user, name=f'Load Test {i}', email=user.email) for i, user in enumerate(users)
+        ])
+        # bulk_create skips the signal that normally adds leaderboard rows
+        LeaderboardEntry.objects.bulk_create([build_entry(student, 0, 0) for student in self.students])
+
+        self.categories = Category.objects.bulk_create([Category(name=f'{prefix}-{i}') for i in range(5)])
+        self.exam = Exam.objects.create(
+            title=f'Load test {self.run_id}', category=self.categories[0], duration=60,
+            total_marks=questions, passing_marks=questions // 2, max_attempts=1,
+        )
+        created = Question.objects.bulk_create([
+            Question(
+                exam=self.exam if i < questions else None,
+                category=self.categories[i % len(self.categories)],
+                difficulty=('easy', 'medium', 'hard')[i % 3],
+                question_text=f'Load test question {i} about topic {i % 97}',
+                option_a='Alpha', option_b='Bravo', option_c='Charlie', option_d='Delta',
+                correct_answer='ABCD'[i % 4],
+                explanation=f'Generated for load test {self.run_id}',
+            )
+            for i in range(questions + bank)
+        ])
+        index_questions(created)
+
+    @property
+    def emails(self):
+        return [student.email for student in self.students]
+
+    def delete(self):
+        attempt_ids = list(self.exam.attempts.values_list('id', flat=True))
+        Job.objects.filter(key__in=[f'post_submit:{attempt_id}' for attempt_id in attempt_ids]).delete()
+        Question.objects.filter(category__in=self.categories).delete()
+        self.exam.delete()
+        User.objects.filter(student_profile__in=self.students).delete()
+        Category.objects.filter(pk__in=[category.pk for category in self.categories]).delete()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryCountingApp:
+    """WSGI wrapper recording the number of SQL queries per load test step."""
+
+    def __init__(self, app):
+        self.app = app
+        self.counts = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        executed = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal executed
+            executed += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.app(environ, start_response)
+        with self.lock:
+            self.counts[environ.get('HTTP_X_LOADTEST_STEP', environ['PATH_INFO'])].append(executed)
+        return response
+
+
+class LocalServer:
+    def __init__(self):
+        self.app = QueryCountingApp(get_wsgi_application())
+        self.httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        self.httpd.request_queue_size = 1024
+        self.httpd.set_app(self.app)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class BackgroundWorker:
+    # Drains the job queue while the load runs, like a separate run_jobs process
+    def __init__(self, workers):
+        self.workers = workers
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.is_set():
+            if not run_worker(workers=self.workers, once=True):
+                self.stopped.wait(0.2)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+
+class LoadTest:
+    def __init__(self, base_url, exam_id, autosaves=3, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.exam_id = exam_id
+        self.autosaves = autosaves
+        self.timeout = timeout
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def call(self, step, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json', STEP_HEADER: step}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+                error = None
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            error = f'HTTP {e.code}: {payload[:200].decode(errors="replace")}'
+        except (urllib.error.URLError, OSError) as e:
+            payload = None
+            error = str(e)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.samples[step].append(elapsed)
+            if error:
+                self.errors[step].append(error)
+        if error:
+            raise RuntimeError(f'{step} failed: {error}')
+        return json.loads(payload)
+
+    def flow(self, email):
+        """One student's exam window: login, start, fetch paper, autosave, submit."""
+        token = self.call('login', 'POST', '/api/auth/login', {'email': email, 'password': PASSWORD})['access_token']
+        attempt = self.call('start-exam', 'POST', '/api/students/start-exam/', {'exam_id': self.exam_id}, token)
+        paper = self.call('paper', 'GET', f'/api/exams/{self.exam_id}/', token=token)
+
+        rng = random.Random(email)
+        answers = [
+            {'question_id': question['id'], 'selected_answer': rng.choice('ABCD'), 'time_taken': rng.randint(5, 90)}
+            for question in paper['questions']
+        ]
+        # Spread the answers over the autosaves, the last share goes with the submit
+        shares = [answers[i::self.autosaves + 1] for i in range(self.autosaves + 1)]
+        for share in shares[:-1]:
+            if share:
+                self.call('save-answers', 'POST', '/api/students/save-answers/', {
+                    'attempt_id': attempt['id'], 'answers': share,
+                }, token)
+        self.call('submit-exam', 'POST', '/api/students/submit-exam/', {
+            'attempt_id': attempt['id'], 'answers': shares[-1],
+        }, token)
+
+    def run(self, emails, concurrency):
+        failures = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(self.flow, email) for email in emails]:
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append(str(e))
+        return time.perf_counter() - started, failures
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(test, duration, failures, query_counts, config):
+    endpoints = {}
+    total_requests = 0
+    for step, samples in test.samples.items():
+        samples = sorted(samples)
+        queries = query_counts.get(step, [])
+        total_requests += len(samples)
+        endpoints[step] = {
+            'requests': len(samples),
+            'errors': len(test.errors[step]),
+            'p50_ms': round(percentile(samples, 50), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'p99_ms': round(percentile(samples, 99), 2),
+            'mean_ms': round(sum(samples) / len(samples), 2),
+            'max_ms': round(samples[-1], 2),
+            'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+    return {
+        'finished_at': timezone.now().isoformat(),
+        'git_commit': git_commit(),
+        'database': connection.vendor,
+        'config': config,
+        'duration_seconds': round(duration, 3),
+        'requests': total_requests,
+        'throughput_rps': round(total_requests / duration, 2) if duration else None,
+        'flows': {'completed': config['students'] - len(failures), 'failed': len(failures)},
+        'sample_failures': failures[:10],
+        'endpoints': endpoints,
+    }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.achievements import backfill_achievement, parse_criteria
+from api.models import Achievement
+
+
+class Command(BaseCommand):
+    help = 'Award achievements to every student who already meets their criteria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('achievement_ids', nargs='*', type=int, help='Only these achievements (default: all)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        achievements = Achievement.objects.order_by('id')
+        if options['achievement_ids']:
+            achievements = achievements.filter(pk__in=options['achievement_ids'])
+            if len(achievements) != len(set(options['achievement_ids'])):
+                raise CommandError('Unknown achievement id')
+
+        for achievement in achievements:
+            if parse_criteria(achievement.criteria) is None:
+                self.stdout.write(self.style.WARNING(f'{achievement.name}: unknown criteria {achievement.criteria!r}, skipped'))
+                continue
+            awarded = backfill_achievement(achievement, options['batch_size'])
+            self.stdout.write(f'{achievement.name}: awarded to {awarded} students')
+        self.stdout.write(self.style.SUCCESS('Achievements are up to date'))
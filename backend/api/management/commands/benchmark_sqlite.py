@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent exam submissions under the default and production SQLite profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--questions', type=int, default=30)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--output', help='Write both load test reports to this JSON file')
+
+    def run_profile(self, profile, options):
+        # A separate process per profile, since settings are read at startup
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as report_file:
+            report_path = report_file.name
+        try:
+            result = subprocess.run(
+                [
+                    sys.executable, str(settings.BASE_DIR / 'manage.py'), 'loadtest',
+                    '--students', str(options['students']),
+                    '--questions', str(options['questions']),
+                    '--bank', '0',
+                    '--concurrency', str(options['concurrency']),
+                    '--worker',
+                    '--output', report_path,
+                ],
+                env={**os.environ, 'SQLITE_PROFILE': profile},
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode:
+                raise CommandError(f'Load test with the {profile} profile failed:\n{result.stderr[-2000:]}')
+            with open(report_path) as report:
+                return json.load(report)
+        finally:
+            os.remove(report_path)
+
+    def handle(self, *args, **options):
+        reports = {}
+        for profile in PROFILES:
+            self.stdout.write(f'Running the load test with SQLITE_PROFILE={profile}')
+            reports[profile] = self.run_profile(profile, options)
+
+        self.stdout.write('')
+        self.stdout.write(f'{"profile":<12}{"flows ok":>10}{"failed":>8}{"errors":>8}{"req/s":>9}{"submit/s":>10}{"submit p50":>12}{"submit p95":>12}')
+        for profile, report in reports.items():
+            submit = report['endpoints'].get('submit-exam', {})
+            errors = sum(endpoint['errors'] for endpoint in report['endpoints'].values())
+            submits_ok = submit.get('requests', 0) - submit.get('errors', 0)
+            self.stdout.write(
+                f'{profile:<12}{report["flows"]["completed"]:>10}{report["flows"]["failed"]:>8}{errors:>8}'
+                f'{report["throughput_rps"]:>9}{round(submits_ok / report["duration_seconds"], 2):>10}'
+                f'{submit.get("p50_ms", "-"):>12}{submit.get("p95_ms", "-"):>12}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(reports, output, indent=2)
+            self.stdout.write(f'Reports written to {options["output"]}')
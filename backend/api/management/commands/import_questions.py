@@ -0,0 +1,36 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.importers import ImportFormatError, detect_format, import_questions
+from api.models import Exam
+
+
+class Command(BaseCommand):
+    help = 'Bulk import questions from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--exam', type=int, help='Add the questions to this exam instead of the bank')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    def handle(self, *args, **options):
+        try:
+            fmt = detect_format(options['path'], options['file_format'])
+        except ImportFormatError as e:
+            raise CommandError(e)
+
+        exam = None
+        if options['exam']:
+            try:
+                exam = Exam.objects.get(pk=options['exam'])
+            except Exam.DoesNotExist:
+                raise CommandError(f'Exam {options["exam"]} does not exist')
+
+        with open(options['path'], 'rb') as stream:
+            report = import_questions(stream, fmt, exam=exam, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        for error in report['errors']:
+            self.stderr.write(f'Row {error["row"]}: {json.dumps(error["errors"])}')
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {report["created"]} questions, {report["failed"]} rows failed'))
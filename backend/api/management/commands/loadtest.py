@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+from contextlib import nullcontext
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from api.loadtest import BackgroundWorker, LoadTest, LocalServer, Seed, build_report
+
+
+class Command(BaseCommand):
+    help = 'Simulate an exam window: concurrent login, start, autosave and submit flows, with latency and query stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--questions', type=int, default=30, help='Questions in the exam paper')
+        parser.add_argument('--bank', type=int, default=500, help='Extra questions in the question bank')
+        parser.add_argument('--concurrency', type=int, default=20, help='Students taking the exam at the same time')
+        parser.add_argument('--autosaves', type=int, default=3, help='save-answers calls per student before submitting')
+        parser.add_argument('--worker', action='store_true', help='Run the job worker while the load runs')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--base-url', help='Drive an already running server sharing this database instead of an in-process one')
+        parser.add_argument('--in-place', action='store_true', help='Seed the configured database instead of a throwaway SQLite copy')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data')
+
+    def handle(self, *args, **options):
+        isolated = not options['in_place'] and not options['base_url']
+        if isolated:
+            if connection.vendor != 'sqlite':
+                raise CommandError('The throwaway database needs SQLite; pass --in-place to use the configured one')
+            # Every thread's connection shares this settings dict, like the test runner does
+            handle, path = tempfile.mkstemp(prefix='loadtest-', suffix='.sqlite3')
+            os.close(handle)
+            connection.close()
+            connection.settings_dict['NAME'] = path
+            self.stdout.write(f'Migrating throwaway database {path}')
+            call_command('migrate', verbosity=0)
+
+        try:
+            self.stdout.write('Seeding students, exam and question bank')
+            seed = Seed(options['students'], options['questions'], options['bank'])
+            config = {
+                field: options[field]
+                for field in ('students', 'questions', 'bank', 'concurrency', 'autosaves', 'worker', 'base_url')
+            }
+            config['isolated_database'] = isolated
+            try:
+                report = self.run_load(seed, options, config)
+            finally:
+                if not options['keep'] and not isolated:
+                    seed.delete()
+        finally:
+            if isolated:
+                connection.close()
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}')
+
+    def run_load(self, seed, options, config):
+        self.stdout.write(f'Running {options["students"]} exam flows, {options["concurrency"]} at a time')
+        if options['base_url']:
+            test = LoadTest(options['base_url'], seed.exam.pk, options['autosaves'])
+            with BackgroundWorker(2) if options['worker'] else nullcontext():
+                duration, failures = test.run(seed.emails, options['concurrency'])
+            return build_report(test, duration, failures, {}, config)
+
+        with LocalServer() as server:
+            test = LoadTest(server.base_url, seed.exam.pk, options['autosaves'])
+            with BackgroundWorker(2) if options['worker'] else nullcontext():
+                duration, failures = test.run(seed.emails, options['concurrency'])
+        return build_report(test, duration, failures, server.app.counts, config)
+
+    def print_report(self, report):
+        self.stdout.write('')
+        self.stdout.write(f'{"endpoint":<14}{"reqs":>7}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>9}')
+        for step, stats in report['endpoints'].items():
+            queries = '-' if stats['queries_mean'] is None else stats['queries_mean']
+            self.stdout.write(
+                f'{step:<14}{stats["requests"]:>7}{stats["errors"]:>8}{stats["p50_ms"]:>10}'
+                f'{stats["p95_ms"]:>10}{stats["p99_ms"]:>10}{queries:>9}'
+            )
+        self.stdout.write('')
+        summary = (
+            f'{report["flows"]["completed"]} flows completed, {report["flows"]["failed"]} failed in '
+            f'{report["duration_seconds"]}s ({report["throughput_rps"]} requests/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not report['flows']['failed'] else self.style.WARNING(summary))
+        for failure in report['sample_failures']:
+            self.stdout.write(f'  {failure}')
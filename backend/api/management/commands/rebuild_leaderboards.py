@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized global and per-exam leaderboards from exam attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_leaderboards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt leaderboards for {rebuilt} students'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from api.search import rebuild_index, uses_fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over the question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not uses_fts():
+            self.stdout.write('Full-text search needs SQLite; other databases search with LIKE')
+            return
+        indexed = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} questions'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from api.stats import rebuild_student_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute every StudentStats rollup from exam attempts and answers'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_student_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {rebuilt} students'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from api.models import Exam
+from api.ranking import update_global_ranks, calculate_exam_ranks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored global student ranks (and optionally exam ranks) to repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--exams', action='store_true', help='Also rebuild the rank of every exam attempt')
+
+    def handle(self, *args, **options):
+        updated = update_global_ranks(batch_size=options['batch_size'])
+        self.stdout.write(f'Global ranks: {updated} students updated')
+
+        if options['exams']:
+            for exam_id in Exam.objects.values_list('id', flat=True).iterator():
+                updated = calculate_exam_ranks(exam_id)
+                if updated:
+                    self.stdout.write(f'Exam {exam_id}: {updated} attempts updated')
+
+        self.stdout.write(self.style.SUCCESS('Re-rank complete'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from api.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (post-submission ranks, points, achievements, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Size of the worker thread pool (default: JOB_QUEUE WORKERS)')
+        parser.add_argument('--tick', type=float, help='Seconds to wait when the queue is empty (default: JOB_QUEUE TICK_SECONDS)')
+        parser.add_argument('--batch-size', type=int, help='Jobs claimed per tick (default: JOB_QUEUE BATCH_SIZE)')
+        parser.add_argument('--once', action='store_true', help='Process one batch and exit')
+
+    def handle(self, *args, **options):
+        try:
+            processed = run_worker(
+                workers=options['workers'],
+                tick=options['tick'],
+                batch_size=options['batch_size'],
+                once=options['once'],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
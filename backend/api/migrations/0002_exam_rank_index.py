@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-17 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["exam", "status", "-score", "time_spent"],
+                name="attempt_exam_rank_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_exam_rank_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["-total_points", "id"], name="student_points_rank_idx"
+            ),
+        ),
+    ]
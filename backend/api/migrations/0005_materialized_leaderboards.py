@@ -0,0 +1,160 @@
+# Generated by Django 5.0 on 2026-10-17 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_leaderboards(apps, schema_editor):
+    Student = apps.get_model("api", "Student")
+    ExamAttempt = apps.get_model("api", "ExamAttempt")
+    LeaderboardEntry = apps.get_model("api", "LeaderboardEntry")
+    ExamLeaderboardEntry = apps.get_model("api", "ExamLeaderboardEntry")
+    completed = models.Q(exam_attempts__status="completed")
+
+    students = Student.objects.annotate(
+        completed=models.Count("exam_attempts", filter=completed),
+        average=models.Avg("exam_attempts__percentage", filter=completed),
+    )
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                student=student,
+                student_name=student.name,
+                profile_image=(
+                    student.profile_image.url if student.profile_image else None
+                ),
+                total_points=student.total_points,
+                exams_completed=student.completed,
+                average_score=student.average or 0,
+            )
+            for student in students
+        ],
+        batch_size=1000,
+    )
+
+    attempts = ExamAttempt.objects.filter(status="completed").select_related("student")
+    ExamLeaderboardEntry.objects.bulk_create(
+        [
+            ExamLeaderboardEntry(
+                exam_id=attempt.exam_id,
+                attempt=attempt,
+                student_name=attempt.student.name,
+                profile_image=(
+                    attempt.student.profile_image.url
+                    if attempt.student.profile_image
+                    else None
+                ),
+                score=attempt.score,
+                percentage=attempt.percentage,
+                time_spent=attempt.time_spent,
+            )
+            for attempt in attempts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_job_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExamLeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("student_name", models.CharField(max_length=200)),
+                (
+                    "profile_image",
+                    models.CharField(
+                        blank=True,
+                        help_text="Profile image URL",
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("percentage", models.FloatField()),
+                ("time_spent", models.IntegerField(default=0)),
+                (
+                    "attempt",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entry",
+                        to="api.examattempt",
+                    ),
+                ),
+                (
+                    "exam",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to="api.exam",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["exam", "-score", "time_spent", "attempt"],
+                        name="exam_leaderboard_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("student_name", models.CharField(max_length=200)),
+                (
+                    "profile_image",
+                    models.CharField(
+                        blank=True,
+                        help_text="Profile image URL",
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                ("total_points", models.IntegerField(default=0)),
+                ("exams_completed", models.IntegerField(default=0)),
+                ("average_score", models.FloatField(default=0.0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entry",
+                        to="api.student",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-total_points", "student"],
+                        name="leaderboard_points_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-17 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_materialized_leaderboards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exam",
+            name="paper_version",
+            field=models.IntegerField(
+                default=1,
+                editable=False,
+                help_text="Bumped whenever the question set changes",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-17 20:42
+
+from django.db import migrations, models
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    # Keep the latest answer per (attempt, question) before enforcing uniqueness
+    StudentAnswer = apps.get_model("api", "StudentAnswer")
+    latest = (
+        StudentAnswer.objects.values("attempt_id", "question_id")
+        .annotate(keep=models.Max("id"), count=models.Count("id"))
+        .filter(count__gt=1)
+    )
+    for row in latest:
+        StudentAnswer.objects.filter(
+            attempt_id=row["attempt_id"], question_id=row["question_id"]
+        ).exclude(id=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_exam_paper_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="studentanswer",
+            constraint=models.UniqueConstraint(
+                fields=("attempt", "question"), name="unique_attempt_question"
+            ),
+        ),
+    ]
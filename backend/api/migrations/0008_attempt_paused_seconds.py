@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-17 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_unique_student_answer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="paused_seconds",
+            field=models.IntegerField(
+                default=0, help_text="Total time spent paused in seconds"
+            ),
+        ),
+    ]
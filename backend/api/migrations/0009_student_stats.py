@@ -0,0 +1,66 @@
+# Generated by Django 5.0 on 2026-10-17 20:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_attempt_paused_seconds"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("completed_count", models.IntegerField(default=0)),
+                ("percentage_sum", models.FloatField(default=0.0)),
+                ("percentage_max", models.FloatField(blank=True, null=True)),
+                ("perfect_count", models.IntegerField(default=0)),
+                (
+                    "total_time",
+                    models.IntegerField(
+                        default=0, help_text="Total time spent in seconds"
+                    ),
+                ),
+                (
+                    "category_stats",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="{category: {attempts, percentage_sum, correct, total}}",
+                    ),
+                ),
+                (
+                    "difficulty_stats",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="{difficulty: {correct, total}}",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to="api.student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Student stats",
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-17 20:46
+
+from django.db import migrations
+
+# FTS5 is SQLite only; other databases fall back to LIKE filtering in api.search
+CREATE_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS api_question_fts USING fts5(
+    question_text, options, explanation,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+FILL_INDEX = """
+INSERT INTO api_question_fts (rowid, question_text, options, explanation)
+SELECT id, question_text,
+       option_a || ' ' || option_b || ' ' || coalesce(option_c, '') || ' ' || coalesce(option_d, ''),
+       coalesce(explanation, '')
+FROM api_question
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(CREATE_INDEX)
+        schema_editor.execute(FILL_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS api_question_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_student_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_question_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exam",
+            index=models.Index(
+                fields=["is_active", "-created_at"], name="exam_active_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["student", "-start_time"], name="attempt_student_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["exam", "status", "-start_time"], name="attempt_exam_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at"], name="notification_user_created_idx"
+            ),
+        ),
+    ]
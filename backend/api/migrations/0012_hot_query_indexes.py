@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-17 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["student", "exam"], name="attempt_student_exam_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["student", "status", "percentage"],
+                name="attempt_student_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("is_read", False)),
+                fields=["user", "-created_at"],
+                name="notification_unread_idx",
+            ),
+        ),
+    ]
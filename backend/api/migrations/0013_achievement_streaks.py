@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-17 21:10
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def fill_streaks(apps, schema_editor):
+    ExamAttempt = apps.get_model("api", "ExamAttempt")
+    StudentStats = apps.get_model("api", "StudentStats")
+    streaks = {}
+    days = (
+        ExamAttempt.objects.filter(status="completed", end_time__isnull=False)
+        .values_list("student_id", TruncDate("end_time"))
+        .distinct()
+        .order_by("student_id", TruncDate("end_time"))
+    )
+    for student_id, day in days:
+        current, best, last = streaks.get(student_id, (0, 0, None))
+        current = current + 1 if last == day - timedelta(days=1) else 1
+        streaks[student_id] = (current, max(best, current), day)
+
+    rows = list(StudentStats.objects.filter(student_id__in=streaks))
+    for stats in rows:
+        stats.current_streak, stats.best_streak, stats.last_active_date = streaks[stats.student_id]
+    StudentStats.objects.bulk_update(rows, ["current_streak", "best_streak", "last_active_date"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentstats",
+            name="best_streak",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="studentstats",
+            name="current_streak",
+            field=models.IntegerField(
+                default=0,
+                help_text="Consecutive days with a completed exam, up to last_active_date",
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentstats",
+            name="last_active_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="achievement",
+            name="criteria",
+            field=models.CharField(
+                help_text="e.g., complete_10_exams, score_100_percent, streak_7_days, master_Math_80_percent",
+                max_length=200,
+            ),
+        ),
+        migrations.RunPython(fill_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_achievement_streaks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exam",
+            name="blueprint",
+            field=models.JSONField(
+                blank=True,
+                help_text="Per-student variants: [{category, difficulty, count}] drawn from this exam's questions",
+                null=True,
+            ),
+        ),
+    ]
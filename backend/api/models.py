@@ -24,6 +24,11 @@ class Student(models.Model):
     rank = models.IntegerField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_points', 'id'], name='student_points_rank_idx'),
+        ]
+    
     def __str__(self):
         return self.name
 
@@ -60,9 +65,16 @@ class Exam(models.Model):
     max_attempts = models.IntegerField(default=1, help_text='Max attempts allowed (0 for unlimited in practice mode)')
     show_results_immediately = models.BooleanField(default=False)
     shuffle_questions = models.BooleanField(default=False)
+    blueprint = models.JSONField(blank=True, null=True, help_text='Per-student variants: [{category, difficulty, count}] drawn from this exam\'s questions')
+    paper_version = models.IntegerField(default=1, editable=False, help_text='Bumped whenever the question set changes')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='exam_active_created_idx'),
+        ]
+    
     def is_scheduled(self):
         if not self.start_date or not self.end_date:
             return False
@@ -126,6 +138,7 @@ class ExamAttempt(models.Model):
     end_time = models.DateTimeField(blank=True, null=True)
     pause_time = models.DateTimeField(blank=True, null=True)
     resume_time = models.DateTimeField(blank=True, null=True)
+    paused_seconds = models.IntegerField(default=0, help_text='Total time spent paused in seconds')
     time_spent = models.IntegerField(default=0, help_text='Time spent in seconds')
     score = models.FloatField(blank=True, null=True)
     percentage = models.FloatField(blank=True, null=True)
@@ -138,6 +151,42 @@ class ExamAttempt(models.Model):
     
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['exam', 'status', '-score', 'time_spent'], name='attempt_exam_rank_idx'),
+            models.Index(fields=['student', '-start_time'], name='attempt_student_start_idx'),
+            models.Index(fields=['exam', 'status', '-start_time'], name='attempt_exam_start_idx'),
+            models.Index(fields=['student', 'exam'], name='attempt_student_exam_idx'),
+            # Covers per-student completed counts and percentage averages
+            models.Index(fields=['student', 'status', 'percentage'], name='attempt_student_status_idx'),
+        ]
+    
+    def active_seconds(self, now=None):
+        # Time on the clock so far, pauses excluded
+        until = self.pause_time if self.status == 'paused' and self.pause_time else (now or timezone.now())
+        return max(int((until - self.start_time).total_seconds()) - self.paused_seconds, 0)
+    
+    def remaining_seconds(self, now=None):
+        now = now or timezone.now()
+        remaining = self.exam.duration * 60 - self.active_seconds(now)
+        if self.exam.end_date:
+            remaining = min(remaining, int((self.exam.end_date - now).total_seconds()))
+        return max(remaining, 0)
+    
+    def pause(self, now=None):
+        if self.status == 'in_progress':
+            self.status = 'paused'
+            self.pause_time = now or timezone.now()
+            self.save(update_fields=['status', 'pause_time'])
+    
+    def resume(self, now=None):
+        # Resuming a running attempt (e.g. after a reconnect) writes nothing
+        now = now or timezone.now()
+        if self.status == 'paused':
+            if self.pause_time:
+                self.paused_seconds += int((now - self.pause_time).total_seconds())
+            self.status = 'in_progress'
+            self.resume_time = now
+            self.save(update_fields=['status', 'resume_time', 'paused_seconds'])
     
     def __str__(self):
         return f"{self.student.name} - {self.exam.title}"
@@ -150,6 +199,11 @@ class StudentAnswer(models.Model):
     time_taken = models.IntegerField(default=0, help_text='Time taken in seconds')
     marks_obtained = models.FloatField(default=0.0)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['attempt', 'question'], name='unique_attempt_question'),
+        ]
+    
     def __str__(self):
         return f"{self.attempt.id} - Q{self.question.id}"
 
@@ -170,6 +224,12 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            # Partial: Django compiles is_read=False to NOT is_read, which a
+            # plain (user, is_read) index cannot serve
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
@@ -179,7 +239,7 @@ class Achievement(models.Model):
     description = models.TextField()
     icon = models.CharField(max_length=50, default='🏆')
     points = models.IntegerField(default=0)
-    criteria = models.CharField(max_length=200, help_text='e.g., complete_10_exams, score_100_percent')
+    criteria = models.CharField(max_length=200, help_text='e.g., complete_10_exams, score_100_percent, streak_7_days, master_Math_80_percent')
     
     def __str__(self):
         return self.name
@@ -194,3 +254,91 @@ class StudentAchievement(models.Model):
     
     def __str__(self):
         return f"{self.student.name} - {self.achievement.name}"
+
+class StudentStats(models.Model):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='stats')
+    completed_count = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0.0)
+    percentage_max = models.FloatField(blank=True, null=True)
+    perfect_count = models.IntegerField(default=0)
+    total_time = models.IntegerField(default=0, help_text='Total time spent in seconds')
+    category_stats = models.JSONField(default=dict, blank=True, help_text='{category: {attempts, percentage_sum, correct, total}}')
+    difficulty_stats = models.JSONField(default=dict, blank=True, help_text='{difficulty: {correct, total}}')
+    current_streak = models.IntegerField(default=0, help_text='Consecutive days with a completed exam, up to last_active_date')
+    best_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Student stats'
+    
+    @property
+    def average_percentage(self):
+        return self.percentage_sum / self.completed_count if self.completed_count else 0
+    
+    def __str__(self):
+        return f"{self.student.name} - {self.completed_count} exams"
+
+class LeaderboardEntry(models.Model):
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    student_name = models.CharField(max_length=200)
+    profile_image = models.CharField(max_length=255, blank=True, null=True, help_text='Profile image URL')
+    total_points = models.IntegerField(default=0)
+    exams_completed = models.IntegerField(default=0)
+    average_score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-total_points', 'student'], name='leaderboard_points_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_name} - {self.total_points}"
+
+class ExamLeaderboardEntry(models.Model):
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    attempt = models.OneToOneField(ExamAttempt, on_delete=models.CASCADE, related_name='leaderboard_entry')
+    student_name = models.CharField(max_length=200)
+    profile_image = models.CharField(max_length=255, blank=True, null=True, help_text='Profile image URL')
+    score = models.FloatField()
+    percentage = models.FloatField()
+    time_spent = models.IntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['exam', '-score', 'time_spent', 'attempt'], name='exam_leaderboard_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.exam_id} - {self.student_name}"
+
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=200, unique=True, help_text='Idempotency key, a job is enqueued at most once per key')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    tries = models.IntegerField(default=0)
+    max_tries = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=64, blank=True, null=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_due_idx'),
+            models.Index(fields=['claim_token'], name='job_claim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} - {self.key} ({self.status})"
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import uuid
+from functools import partial
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .jobs import enqueue, register, run_each
+from .models import User, Notification
+from .serializers import NotificationSerializer
+
+DEFAULTS = {
+    'FANOUT_CHUNK_SIZE': 1000,
+    'UNREAD_CACHE_SECONDS': 24 * 60 * 60,
+    'STREAM_SECONDS': 300,
+    'STREAM_POLL_SECONDS': 2.0,
+    'STREAM_RESYNC_SECONDS': 30.0,
+    'STREAM_HEARTBEAT_SECONDS': 15.0,
+    'RECONNECT_SECONDS': 15.0,
+}
+
+
+def notification_setting(name):
+    return getattr(settings, 'NOTIFICATIONS', {}).get(name, DEFAULTS[name])
+
+
+def unread_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def latest_key(user_id):
+    return f'latest_notification:{user_id}'
+
+
+def recount_unread(user_id):
+    # Served by the partial index on unread rows
+    count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    cache.set(unread_key(user_id), count, notification_setting('UNREAD_CACHE_SECONDS'))
+    return count
+
+
+def unread_count(user_id):
+    count = cache.get(unread_key(user_id))
+    return recount_unread(user_id) if count is None else count
+
+
+def adjust_unread(user_id, delta):
+    # A missing counter is simply recounted on the next read
+    try:
+        if delta > 0:
+            cache.incr(unread_key(user_id), delta)
+        elif delta < 0:
+            cache.decr(unread_key(user_id), -delta)
+    except ValueError:
+        pass
+
+
+def announce(user_ids, latest_id):
+    """Bump the unread counters and the marker the streams watch.
+
+    Callers defer this to transaction.on_commit, so a rolled-back or retried
+    insert never bumps the counters twice.
+    """
+    timeout = notification_setting('UNREAD_CACHE_SECONDS')
+    cache.set_many({latest_key(user_id): latest_id for user_id in user_ids}, timeout)
+    for user_id in user_ids:
+        adjust_unread(user_id, 1)
+
+
+def notify(user, notification_type, title, message):
+    notification = Notification.objects.create(
+        user=user, notification_type=notification_type, title=title, message=message
+    )
+    transaction.on_commit(partial(announce, [user.pk], notification.pk))
+    return notification
+
+
+def mark_read(user, notification_ids=None):
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(id__in=notification_ids)
+    updated = unread.update(is_read=True)
+    if notification_ids is None:
+        cache.set(unread_key(user.pk), 0, notification_setting('UNREAD_CACHE_SECONDS'))
+    else:
+        adjust_unread(user.pk, -updated)
+    return updated
+
+
+def broadcast(notification_type, title, message, user_ids=None, role='student'):
+    """Queue a notification for many users; rows are inserted by the job worker."""
+    return enqueue('notification_fanout', f'notification_fanout:{uuid.uuid4().hex}', {
+        'notification_type': notification_type,
+        'title': title,
+        'message': message,
+        'user_ids': user_ids,
+        'role': role,
+    })
+
+
+@register('notification_fanout')
+def notification_fanout(jobs):
+    run_each(jobs, lambda job: fan_out(**job.payload))
+
+
+def fan_out(notification_type, title, message, user_ids=None, role='student'):
+    recipients = User.objects.filter(is_active=True)
+    recipients = recipients.filter(pk__in=user_ids) if user_ids is not None else recipients.filter(role=role)
+    recipient_ids = recipients.order_by('pk').values_list('pk', flat=True).iterator()
+
+    chunk_size = notification_setting('FANOUT_CHUNK_SIZE')
+    sent = 0
+    while chunk := list(islice(recipient_ids, chunk_size)):
+        created = Notification.objects.bulk_create([
+            Notification(user_id=user_id, notification_type=notification_type, title=title, message=message)
+            for user_id in chunk
+        ])
+        latest_id = created[-1].pk or Notification.objects.order_by('-id').values_list('id', flat=True).first()
+        transaction.on_commit(partial(announce, chunk, latest_id))
+        sent += len(chunk)
+    return sent
+
+
+def server_sent_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def latest_notification_id(user_id):
+    return Notification.objects.filter(user_id=user_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def stream_events(user_id, last_id, last_count, resync):
+    """One pass of the stream: events for new notifications and a changed unread count.
+
+    Only the cache is read unless the latest-notification marker moved or a
+    resync is due (the cache may not be shared with the process that created
+    the rows). The unread event carries the last notification id so that a
+    reconnecting client resumes after it. Returns (chunks, last_id, count).
+    """
+    chunks = []
+    marker = cache.get(latest_key(user_id))
+    if resync or (marker is not None and marker > last_id):
+        for notification in Notification.objects.filter(user_id=user_id, id__gt=last_id).order_by('id')[:100]:
+            last_id = notification.pk
+            chunks.append(server_sent_event('notification', NotificationSerializer(notification).data, last_id))
+
+    count = recount_unread(user_id) if resync else unread_count(user_id)
+    if count != last_count:
+        chunks.append(server_sent_event('unread', {'unread_count': count}, last_id))
+    return chunks, last_id, count
+
+
+def retry_field():
+    return f'retry: {int(notification_setting("RECONNECT_SECONDS") * 1000)}\n\n'
+
+
+def notification_snapshot(user, last_id=None):
+    """A single pass of the stream for WSGI servers, which would tie up a worker per client.
+
+    The retry field makes the client reconnect after RECONNECT_SECONDS.
+    """
+    if last_id is None:
+        last_id = latest_notification_id(user.pk)
+    chunks, _, _ = stream_events(user.pk, last_id, None, resync=True)
+    return [retry_field(), *chunks]
+
+
+async def notification_stream(user, last_id=None):
+    """Server-Sent Events feed of a user's new notifications and unread count.
+
+    An async generator: under ASGI every open stream is a coroutine waiting
+    on asyncio.sleep, not a thread, and each chunk is sent as soon as it is
+    yielded. The cache is polled every STREAM_POLL_SECONDS and the database
+    every STREAM_RESYNC_SECONDS. The stream ends after STREAM_SECONDS and the
+    client reconnects with Last-Event-ID, so nothing is missed.
+    """
+    if last_id is None:
+        last_id = await sync_to_async(latest_notification_id)(user.pk)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    last_sync = last_beat = started
+    last_count = None
+    yield retry_field()
+
+    while loop.time() - started < notification_setting('STREAM_SECONDS'):
+        now = loop.time()
+        resync = now - last_sync >= notification_setting('STREAM_RESYNC_SECONDS')
+        if resync:
+            last_sync = now
+        chunks, last_id, last_count = await sync_to_async(stream_events)(user.pk, last_id, last_count, resync)
+        for chunk in chunks:
+            yield chunk
+        if chunks:
+            last_beat = now
+        elif now - last_beat >= notification_setting('STREAM_HEARTBEAT_SECONDS'):
+            last_beat = now
+            yield ': keep-alive\n\n'
+
+        await asyncio.sleep(notification_setting('STREAM_POLL_SECONDS'))
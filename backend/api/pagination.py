@@ -0,0 +1,29 @@
+from django.conf import settings
+from rest_framework import pagination
+
+PAGINATION = getattr(settings, 'PAGINATION', {})
+
+
+class CursorPagination(pagination.CursorPagination):
+    """Keyset pagination: each page is a range scan from an opaque cursor,
+    so deep pages cost the same as the first one."""
+
+    page_size = PAGINATION.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = PAGINATION.get('MAX_PAGE_SIZE', 100)
+    ordering = ('-created_at', '-id')
+
+
+class AttemptCursorPagination(CursorPagination):
+    ordering = ('-start_time', '-id')
+
+
+class QuestionCursorPagination(CursorPagination):
+    ordering = ('id',)
+
+
+def paginate(paginator_class, queryset, request, view, serializer_class, **kwargs):
+    # For plain ViewSets, which have no paginate_queryset() of their own
+    paginator = paginator_class()
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    return paginator.get_paginated_response(serializer_class(page, many=True, **kwargs).data)
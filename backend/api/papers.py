@@ -0,0 +1,82 @@
+import random
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from .serializers import ExamWithQuestionsSerializer
+from .blueprints import build_index, sample_questions
+
+renderer = JSONRenderer()
+
+
+def paper_cache_key(exam):
+    # updated_at covers edits to the exam itself, paper_version edits to its questions
+    return f'exam_paper:{exam.pk}:{exam.paper_version}:{exam.updated_at.timestamp()}'
+
+
+def build_paper(exam):
+    """Serialize the student-safe paper once, split into byte segments.
+
+    The exam fields are kept as a JSON prefix and every question as its own
+    pre-rendered JSON object, so any question order can be produced by
+    joining bytes. It is rendered without a request, so image URLs are
+    relative to the site root.
+    """
+    data = dict(ExamWithQuestionsSerializer(exam).data)
+    questions = data.pop('questions')
+    question_ids = [question['id'] for question in questions]
+    paper = {
+        'head': renderer.render(data)[:-1] + b',"questions":[',
+        'questions': [renderer.render(question) for question in questions],
+        'question_ids': question_ids,
+    }
+    if exam.blueprint:
+        # Bucket index of the pool, so each student's draw costs O(questions drawn)
+        paper['positions'] = {question_id: index for index, question_id in enumerate(question_ids)}
+        paper['buckets'] = build_index(exam.questions.order_by('id').values_list('id', 'category_id', 'difficulty'))
+    return paper
+
+
+def get_paper(exam):
+    key = paper_cache_key(exam)
+    paper = cache.get(key)
+    if paper is None:
+        paper = build_paper(exam)
+        cache.set(key, paper, getattr(settings, 'EXAM_PAPER_CACHE_TIMEOUT', 3600))
+    return paper
+
+
+def question_order(exam, count, seed):
+    order = list(range(count))
+    if exam.shuffle_questions:
+        random.Random(f'{exam.pk}:{seed}').shuffle(order)
+    return order
+
+
+def variant_question_ids(exam, paper, seed):
+    # Without a seed the whole pool is returned
+    if exam.blueprint and seed is not None:
+        return sample_questions(paper['buckets'], exam.blueprint, f'{exam.pk}:{seed}')
+    return paper['question_ids']
+
+
+def paper_question_ids(exam, seed=None):
+    # Question ids in the order this student sees them
+    question_ids = variant_question_ids(exam, get_paper(exam), seed)
+    return [question_ids[index] for index in question_order(exam, len(question_ids), seed)]
+
+
+def render_paper(exam, seed):
+    paper = get_paper(exam)
+    segments = paper['questions']
+    if exam.blueprint:
+        positions = paper['positions']
+        indexes = [positions[question_id] for question_id in variant_question_ids(exam, paper, seed)]
+    else:
+        indexes = range(len(segments))
+    order = question_order(exam, len(indexes), seed)
+    return paper['head'] + b','.join(segments[indexes[index]] for index in order) + b']}'
+
+
+def invalidate_paper(exam):
+    # Superseded versions are never looked up again and expire on their own
+    cache.delete(paper_cache_key(exam))
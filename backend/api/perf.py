@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+DEFAULTS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.1,
+    'WINDOW': 1000,
+}
+
+
+def perf_setting(name):
+    return getattr(settings, 'PERF', {}).get(name, DEFAULTS[name])
+
+
+def percentile(values, p):
+    # Nearest-rank percentile of an already sorted list
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+class PerfStats:
+    """Per-endpoint samples of this process, the latest WINDOW per endpoint."""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, wall, db, queries, render):
+        with self.lock:
+            if endpoint not in self.samples:
+                self.samples[endpoint] = deque(maxlen=self.window)
+                self.requests[endpoint] = 0
+            self.samples[endpoint].append((wall, db, queries, render))
+            self.requests[endpoint] += 1
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.requests.clear()
+
+    def summary(self):
+        with self.lock:
+            samples = {endpoint: list(window) for endpoint, window in self.samples.items()}
+            requests = dict(self.requests)
+
+        endpoints = []
+        for endpoint, rows in samples.items():
+            walls = sorted(row[0] for row in rows)
+            queries = [row[2] for row in rows]
+            endpoints.append({
+                'endpoint': endpoint,
+                'sampled_requests': requests[endpoint],
+                'p50_ms': round(percentile(walls, 50), 2),
+                'p95_ms': round(percentile(walls, 95), 2),
+                'p99_ms': round(percentile(walls, 99), 2),
+                'db_ms_mean': round(sum(row[1] for row in rows) / len(rows), 2),
+                'render_ms_mean': round(sum(row[3] for row in rows) / len(rows), 2),
+                'queries_mean': round(sum(queries) / len(queries), 2),
+                'queries_max': max(queries),
+            })
+        return endpoints
+
+
+stats = PerfStats(perf_setting('WINDOW'))
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render_started = None
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self, response):
+        self.render = time.perf_counter() - self.render_started
+
+
+class PerfMiddleware:
+    """Opt-in, sampled timing of requests.
+
+    A sampled request gets a Server-Timing header (db time and query count,
+    response rendering, total) and is folded into this process's stats,
+    served at /api/_perf. Requests that are not sampled cost one random().
+    """
+
+    def __init__(self, get_response):
+        if not perf_setting('ENABLED'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = perf_setting('SAMPLE_RATE')
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timer = request._perf_timer = RequestTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        wall = time.perf_counter() - timer.started
+
+        match = request.resolver_match
+        endpoint = f'{request.method} {match.view_name if match else request.path_info}'
+        stats.record(endpoint, wall * 1000, timer.db * 1000, timer.queries, timer.render * 1000)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timer.db * 1000:.2f};desc="{timer.queries} queries"',
+            f'render;dur={timer.render * 1000:.2f}',
+            f'total;dur={wall * 1000:.2f}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that separately
+        timer = getattr(request, '_perf_timer', None)
+        if timer is not None:
+            timer.start_render()
+            response.add_post_render_callback(timer.end_render)
+        return response
@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from .models import Student, ExamAttempt
+
+# Ties are broken by id so that ranks are stable
+EXAM_RANK_ORDERING = ('-score', 'time_spent', 'id')
+GLOBAL_RANK_ORDERING = ('-total_points', 'id')
+
+
+def completed_attempts(exam_id):
+    return ExamAttempt.objects.filter(exam_id=exam_id, status='completed')
+
+
+def attempts_ahead_of(attempt):
+    return completed_attempts(attempt.exam_id).filter(
+        Q(score__gt=attempt.score) |
+        Q(score=attempt.score, time_spent__lt=attempt.time_spent) |
+        Q(score=attempt.score, time_spent=attempt.time_spent, id__lt=attempt.id)
+    )
+
+
+def insert_exam_rank(attempt):
+    """Rank a freshly completed attempt without rewriting the whole exam.
+
+    Every attempt ranked at or below the new position moves down by one in
+    a single UPDATE, so a submission costs a count and two updates however
+    many students already finished the exam.
+    """
+    with transaction.atomic():
+        # Attempts still waiting for their own placement are not counted yet
+        rank = attempts_ahead_of(attempt).filter(rank__isnull=False).count() + 1
+        completed_attempts(attempt.exam_id).filter(rank__gte=rank).exclude(pk=attempt.pk).update(rank=F('rank') + 1)
+        ExamAttempt.objects.filter(pk=attempt.pk).update(rank=rank)
+
+    attempt.rank = rank
+    return rank
+
+
+def calculate_exam_ranks(exam_id):
+    # Full rebuild, only needed to repair ranks that drifted
+    attempts = completed_attempts(exam_id).annotate(
+        position=Window(expression=RowNumber(), order_by=list(EXAM_RANK_ORDERING))
+    ).only('id', 'rank')
+
+    stale = []
+    for attempt in attempts:
+        if attempt.rank != attempt.position:
+            attempt.rank = attempt.position
+            stale.append(attempt)
+
+    ExamAttempt.objects.bulk_update(stale, ['rank'], batch_size=500)
+    return len(stale)
+
+
+def students_ahead_of(student):
+    return Student.objects.filter(
+        Q(total_points__gt=student.total_points) |
+        Q(total_points=student.total_points, id__lt=student.id)
+    )
+
+
+def students_behind(student):
+    return Student.objects.filter(
+        Q(total_points__lt=student.total_points) |
+        Q(total_points=student.total_points, id__gt=student.id)
+    )
+
+
+def global_rank_of(student):
+    # Index-only count over (-total_points, id), no table rows are read
+    return students_ahead_of(student).count() + 1
+
+
+def global_top(limit):
+    students = Student.objects.order_by(*GLOBAL_RANK_ORDERING)[:limit]
+    return [(rank, student) for rank, student in enumerate(students, 1)]
+
+
+def students_around(student, radius):
+    """The student with up to `radius` neighbours on each side, ranked."""
+    rank = global_rank_of(student)
+    above = list(students_ahead_of(student).order_by('total_points', '-id')[:radius])
+    below = list(students_behind(student).order_by(*GLOBAL_RANK_ORDERING)[:radius])
+
+    neighbours = list(reversed(above)) + [student] + below
+    first_rank = rank - len(above)
+    return [(first_rank + offset, neighbour) for offset, neighbour in enumerate(neighbours)]
+
+
+def update_global_ranks(batch_size=1000):
+    """Rewrite the stored Student.rank snapshot from total_points.
+
+    Ranks are served on read, so this is only a batch job to repair the
+    denormalised column; it streams students and only writes changed rows.
+    """
+    students = Student.objects.annotate(
+        position=Window(expression=RowNumber(), order_by=list(GLOBAL_RANK_ORDERING))
+    ).only('id', 'rank')
+
+    stale = []
+    updated = 0
+    for student in students.iterator(chunk_size=batch_size):
+        if student.rank != student.position:
+            student.rank = student.position
+            stale.append(student)
+        if len(stale) >= batch_size:
+            Student.objects.bulk_update(stale, ['rank'])
+            updated += len(stale)
+            stale = []
+
+    if stale:
+        Student.objects.bulk_update(stale, ['rank'])
+        updated += len(stale)
+    return updated
@@ -0,0 +1,35 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class PassthroughRenderer(BaseRenderer):
+    """Lets ?format= select a streaming export; the view builds the response body itself.
+
+    Anything that still reaches the renderer is an ordinary payload, in
+    practice an error, and goes out as JSON rather than the dict's keys.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (dict, list)):
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = JSONRenderer.media_type
+            return JSONRenderer().render(data, renderer_context=renderer_context)
+        return data
+
+
+class CSVRenderer(PassthroughRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+class JSONLinesRenderer(PassthroughRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+
+
+class EventStreamRenderer(PassthroughRenderer):
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
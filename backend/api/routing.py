@@ -0,0 +1,6 @@
+from django.urls import path
+from .consumers import ExamAttemptConsumer
+
+websocket_urlpatterns = [
+    path('ws/attempts/<int:attempt_id>/', ExamAttemptConsumer.as_asgi()),
+]
@@ -0,0 +1,131 @@
+import re
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .models import Question
+
+SEARCH_TABLE = 'api_question_fts'
+# bm25 weights for question_text, options and explanation
+COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+FILTER_COLUMNS = {'exam': 'exam_id', 'category': 'category_id', 'difficulty': 'difficulty'}
+TERM_RE = re.compile(r'\w+\*?')
+
+
+def uses_fts():
+    # The FTS5 table only exists on SQLite, see migration 0010
+    return connection.vendor == 'sqlite'
+
+
+def question_document(question):
+    options = ' '.join(option or '' for option in (question.option_a, question.option_b, question.option_c, question.option_d))
+    return (question.pk, question.question_text, options, question.explanation or '')
+
+
+def index_questions(questions):
+    rows = [question_document(question) for question in questions]
+    if rows and uses_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, question_text, options, explanation) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+
+def unindex_questions(question_ids):
+    if question_ids and uses_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in question_ids])
+
+
+def rebuild_index(batch_size=1000):
+    if not uses_fts():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    batch = []
+    indexed = 0
+    for question in Question.objects.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(question)
+        if len(batch) == batch_size:
+            index_questions(batch)
+            indexed += len(batch)
+            batch = []
+    index_questions(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed + len(batch)
+
+
+def search_terms(query):
+    # Only words (with an optional trailing * for prefix search) are kept,
+    # so user input can never produce an FTS syntax error
+    return TERM_RE.findall(query or '')
+
+
+def match_expression(query):
+    return ' '.join(
+        f'"{term[:-1]}"*' if term.endswith('*') else f'"{term}"'
+        for term in search_terms(query)
+    )
+
+
+def like_filter(query):
+    condition = Q()
+    for term in search_terms(query):
+        term = term.rstrip('*')
+        condition &= (
+            Q(question_text__icontains=term) | Q(option_a__icontains=term) | Q(option_b__icontains=term)
+            | Q(option_c__icontains=term) | Q(option_d__icontains=term) | Q(explanation__icontains=term)
+        )
+    return condition
+
+
+def filter_questions(queryset, query):
+    """Restrict a Question queryset to search matches, without ranking."""
+    if not uses_fts():
+        return queryset.filter(like_filter(query))
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match_expression(query)]
+    ))
+
+
+def search_questions(query, limit=20, offset=0, **filters):
+    """Ranked search over the question bank.
+
+    Returns (total matches, [(question, relevance), ...]) for one page, best
+    match first. filters may narrow the bank by exam, category or difficulty.
+    """
+    if not search_terms(query):
+        return 0, []
+
+    if not uses_fts():
+        questions = Question.objects.filter(like_filter(query), **{
+            FILTER_COLUMNS[name]: value for name, value in filters.items() if value
+        }).select_related('category').order_by('pk')
+        return questions.count(), [(question, None) for question in questions[offset:offset + limit]]
+
+    where = [f'{SEARCH_TABLE} MATCH %s']
+    params = [match_expression(query)]
+    for name, value in filters.items():
+        if value:
+            where.append(f'api_question.{FILTER_COLUMNS[name]} = %s')
+            params.append(value)
+    source = (
+        f'FROM {SEARCH_TABLE} JOIN api_question ON api_question.id = {SEARCH_TABLE}.rowid '
+        f'WHERE {" AND ".join(where)}'
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) {source}', params)
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT {SEARCH_TABLE}.rowid, bm25({SEARCH_TABLE}, %s, %s, %s) AS score {source} '
+            f'ORDER BY score LIMIT %s OFFSET %s',
+            [*COLUMN_WEIGHTS, *params, limit, offset],
+        )
+        hits = cursor.fetchall()
+
+    questions = Question.objects.select_related('category').in_bulk([pk for pk, score in hits])
+    # bm25 scores are negative, lower is better
+    return count, [(questions[pk], round(-score, 4)) for pk, score in hits if pk in questions]
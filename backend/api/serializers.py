@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Student, Exam, Question, ExamAttempt, StudentAnswer, Category, Notification, Achievement, StudentAchievement
+from .achievements import parse_criteria
+from .blueprints import BlueprintError, build_index, clean_blueprint, sample_questions
 
 User = get_user_model()
 
@@ -59,11 +61,12 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
     
+    # List querysets annotate the counts; single objects fall back to a query
     def get_exams_count(self, obj):
-        return obj.exams.count()
+        return obj.exams_count if hasattr(obj, 'exams_count') else obj.exams.count()
     
     def get_questions_count(self, obj):
-        return obj.questions.count()
+        return obj.questions_count if hasattr(obj, 'questions_count') else obj.questions.count()
 
 class QuestionSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -89,7 +92,10 @@ class ExamSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_questions_count(self, obj):
-        return obj.questions.count()
+        # A variant exam shows each student one blueprint's worth of its pool
+        if obj.blueprint:
+            return sum(section['count'] for section in obj.blueprint)
+        return obj.questions_count if hasattr(obj, 'questions_count') else obj.questions.count()
     
     def get_is_scheduled_now(self, obj):
         return obj.is_scheduled()
@@ -99,6 +105,19 @@ class ExamSerializer(serializers.ModelSerializer):
     
     def get_is_expired_exam(self, obj):
         return obj.is_expired()
+    
+    def validate_blueprint(self, value):
+        if value is None:
+            return value
+        try:
+            sections = clean_blueprint(value)
+            if self.instance is not None:
+                # The exam's own questions must be able to fill every variant
+                pool = self.instance.questions.values_list('id', 'category_id', 'difficulty')
+                sample_questions(build_index(pool), sections, seed=0)
+        except BlueprintError as e:
+            raise serializers.ValidationError(str(e))
+        return sections
 
 class ExamWithQuestionsSerializer(serializers.ModelSerializer):
     questions = QuestionForStudentSerializer(many=True, read_only=True)
@@ -108,6 +127,8 @@ class ExamWithQuestionsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class StudentAnswerSerializer(serializers.ModelSerializer):
+    question_id = serializers.IntegerField()
+    
     class Meta:
         model = StudentAnswer
         fields = ('question_id', 'selected_answer', 'time_taken')
@@ -122,6 +143,17 @@ class StudentAnswerDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class ExamSubmitSerializer(serializers.Serializer):
+    attempt_id = serializers.IntegerField()
+    # Optional when every answer was already autosaved
+    answers = StudentAnswerSerializer(many=True, default=list)
+
+class AnswerSaveSerializer(serializers.Serializer):
+    attempt_id = serializers.IntegerField()
+    question_id = serializers.IntegerField()
+    selected_answer = serializers.CharField(max_length=10)
+    time_taken = serializers.IntegerField(default=0)
+
+class AnswersSaveSerializer(serializers.Serializer):
     attempt_id = serializers.IntegerField()
     answers = StudentAnswerSerializer(many=True)
 
@@ -167,6 +199,14 @@ class AchievementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Achievement
         fields = '__all__'
+    
+    def validate_criteria(self, value):
+        if parse_criteria(value) is None:
+            raise serializers.ValidationError(
+                'Unknown criteria; use complete_<n>_exams, score_100_percent[_<n>_times], '
+                'streak_<n>_days or master_<category>_<percent>_percent'
+            )
+        return value.strip()
 
 class StudentAchievementSerializer(serializers.ModelSerializer):
     achievement_name = serializers.CharField(source='achievement.name', read_only=True)
@@ -183,7 +223,13 @@ class LeaderboardSerializer(serializers.Serializer):
     total_points = serializers.IntegerField()
     exams_completed = serializers.IntegerField()
     average_score = serializers.FloatField()
-    profile_image = serializers.ImageField(allow_null=True)
+    profile_image = serializers.CharField(allow_null=True)
+
+class RankedStudentSerializer(serializers.Serializer):
+    rank = serializers.IntegerField()
+    student_id = serializers.IntegerField()
+    student_name = serializers.CharField()
+    total_points = serializers.IntegerField()
 
 class AnalyticsSerializer(serializers.Serializer):
     total_exams = serializers.IntegerField()
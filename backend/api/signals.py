@@ -0,0 +1,89 @@
+from django.db.models import F
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Student, Category, Exam, Question, Achievement
+from .achievements import enqueue_backfill, invalidate_rules
+from .blueprints import invalidate_bank
+from .leaderboards import build_entry, sync_student_profile
+from .papers import invalidate_paper
+from .search import index_questions, unindex_questions
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        build_entry(instance, 0, 0).save()
+    else:
+        sync_student_profile(instance)
+
+
+def bump_paper_versions(exam_ids):
+    exam_ids = {exam_id for exam_id in exam_ids if exam_id}
+    if exam_ids:
+        # updated_at moves too, so Last-Modified and ETags see question edits
+        Exam.objects.filter(pk__in=exam_ids).update(paper_version=F('paper_version') + 1, updated_at=timezone.now())
+
+
+@receiver(post_init, sender=Question)
+def question_loaded(sender, instance, **kwargs):
+    # Remembered so that moving a question also invalidates its old exam
+    instance._loaded_exam_id = instance.exam_id
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_paper_versions([instance.exam_id, instance._loaded_exam_id])
+    if instance.exam_id is None or instance._loaded_exam_id is None:
+        invalidate_bank()
+    instance._loaded_exam_id = instance.exam_id
+    index_questions([instance])
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    bump_paper_versions([instance.exam_id])
+    if instance.exam_id is None:
+        invalidate_bank()
+    unindex_questions([instance.pk])
+
+
+@receiver(pre_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def exam_changed(sender, instance, raw=False, **kwargs):
+    # pre_save still sees the old updated_at, i.e. the key currently cached
+    if instance.pk and instance.updated_at and not raw:
+        invalidate_paper(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, created=False, raw=False, **kwargs):
+    # Exam lists show the category name
+    if not created and not raw:
+        Exam.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_init, sender=Achievement)
+def achievement_loaded(sender, instance, **kwargs):
+    instance._loaded_criteria = instance.criteria
+
+
+@receiver(post_save, sender=Achievement)
+def achievement_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_rules()
+    # A new or changed rule is applied to students who already qualify
+    if created or instance.criteria != instance._loaded_criteria:
+        enqueue_backfill(instance)
+    instance._loaded_criteria = instance.criteria
+
+
+@receiver(post_delete, sender=Achievement)
+def achievement_deleted(sender, instance, **kwargs):
+    invalidate_rules()
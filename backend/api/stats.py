@@ -0,0 +1,138 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ExamAttempt, StudentAnswer, StudentStats
+
+
+def add_counts(bucket, key, correct, total):
+    counts = bucket.setdefault(key, {})
+    counts['correct'] = counts.get('correct', 0) + correct
+    counts['total'] = counts.get('total', 0) + total
+
+
+def extend_streak(stats, day):
+    # Days arrive in order; a day that is not the next one starts a new run
+    if stats.last_active_date is not None and day <= stats.last_active_date:
+        return
+    if stats.last_active_date == day - timedelta(days=1):
+        stats.current_streak += 1
+    else:
+        stats.current_streak = 1
+    stats.best_streak = max(stats.best_streak, stats.current_streak)
+    stats.last_active_date = day
+
+
+def collect_rollups(completed, answers):
+    # Set-based: four grouped queries, whatever the number of students
+    rollups = defaultdict(lambda: StudentStats(category_stats={}, difficulty_stats={}))
+
+    for row in completed.values('student_id').annotate(
+        completed_count=Count('id'),
+        percentage_sum=Sum('percentage'),
+        percentage_max=Max('percentage'),
+        perfect_count=Count('id', filter=Q(percentage=100)),
+        total_time=Sum('time_spent'),
+    ).order_by():
+        stats = rollups[row.pop('student_id')]
+        for field, value in row.items():
+            setattr(stats, field, value or 0)
+
+    for row in completed.filter(exam__category__isnull=False).values('student_id', 'exam__category__name').annotate(
+        attempts=Count('id'), percentage_sum=Sum('percentage')
+    ).order_by():
+        category = rollups[row['student_id']].category_stats.setdefault(row['exam__category__name'], {})
+        category['attempts'] = row['attempts']
+        category['percentage_sum'] = row['percentage_sum']
+
+    for row in answers.values('attempt__student_id', 'question__difficulty', 'question__category__name').annotate(
+        correct=Count('id', filter=Q(is_correct=True)), total=Count('id')
+    ).order_by():
+        stats = rollups[row['attempt__student_id']]
+        add_counts(stats.difficulty_stats, row['question__difficulty'], row['correct'], row['total'])
+        if row['question__category__name']:
+            add_counts(stats.category_stats, row['question__category__name'], row['correct'], row['total'])
+
+    active_days = completed.filter(end_time__isnull=False).values_list('student_id', TruncDate('end_time'))
+    for student_id, day in active_days.distinct().order_by('student_id', TruncDate('end_time')):
+        extend_streak(rollups[student_id], day)
+
+    for student_id, stats in rollups.items():
+        stats.student_id = student_id
+    return rollups
+
+
+def apply_attempt_to_stats(attempt, answer_key, graded_answers):
+    """Fold one graded attempt into the student's rollup row.
+
+    Runs inside the grading transaction; answer_key supplies each question's
+    difficulty and category so no further lookups are needed.
+    """
+    stats = StudentStats.objects.select_for_update().filter(student_id=attempt.student_id).first()
+    if stats is None:
+        # First rollup for this student: build it from history, this attempt included
+        rollups = collect_rollups(
+            ExamAttempt.objects.filter(student_id=attempt.student_id, status='completed'),
+            StudentAnswer.objects.filter(attempt__student_id=attempt.student_id, attempt__status='completed'),
+        )
+        stats = rollups[attempt.student_id]
+        stats.save()
+        return stats
+
+    stats.completed_count += 1
+    stats.percentage_sum += attempt.percentage
+    stats.percentage_max = attempt.percentage if stats.percentage_max is None else max(stats.percentage_max, attempt.percentage)
+    stats.total_time += attempt.time_spent
+    if attempt.percentage == 100:
+        stats.perfect_count += 1
+    if attempt.end_time:
+        extend_streak(stats, timezone.localdate(attempt.end_time))
+
+    if attempt.exam.category_id:
+        category = stats.category_stats.setdefault(attempt.exam.category.name, {})
+        category['attempts'] = category.get('attempts', 0) + 1
+        category['percentage_sum'] = category.get('percentage_sum', 0) + attempt.percentage
+
+    for answer in graded_answers:
+        question = answer_key[answer['question_id']]
+        correct = 1 if answer['is_correct'] else 0
+        add_counts(stats.difficulty_stats, question['difficulty'], correct, 1)
+        if question['category__name']:
+            add_counts(stats.category_stats, question['category__name'], correct, 1)
+
+    stats.save()
+    return stats
+
+
+def stats_summary(stats):
+    # The analytics figures, read straight off the rollup row
+    return {
+        'completed_exams': stats.completed_count,
+        'average_score': round(stats.average_percentage, 2),
+        'highest_score': round(stats.percentage_max or 0, 2),
+        'total_time_spent': stats.total_time,
+        'category_wise_performance': {
+            name: round(category['percentage_sum'] / category['attempts'], 2)
+            for name, category in stats.category_stats.items()
+            if category.get('attempts')
+        },
+        'difficulty_wise_performance': {
+            difficulty: round(stats.difficulty_stats[difficulty]['correct'] * 100 / stats.difficulty_stats[difficulty]['total'], 2)
+            if stats.difficulty_stats.get(difficulty, {}).get('total') else 0
+            for difficulty in ('easy', 'medium', 'hard')
+        },
+    }
+
+
+@transaction.atomic
+def rebuild_student_stats():
+    """Recompute every rollup row from raw attempts and answers."""
+    rollups = collect_rollups(
+        ExamAttempt.objects.filter(status='completed'),
+        StudentAnswer.objects.filter(attempt__status='completed'),
+    )
+    StudentStats.objects.all().delete()
+    StudentStats.objects.bulk_create(rollups.values(), batch_size=1000)
+    return len(rollups)
@@ -0,0 +1,58 @@
+from .jobs import register, run_each, enqueue
+from .models import ExamAttempt, StudentStats
+from .achievements import award_achievements
+from .notifications import notify
+from .ranking import insert_exam_rank, calculate_exam_ranks
+from .leaderboards import record_attempt
+
+
+def enqueue_post_submit(attempt):
+    return enqueue('post_submit', f'post_submit:{attempt.pk}', {
+        'attempt_id': attempt.pk,
+        'exam_id': attempt.exam_id,
+    })
+
+
+@register('post_submit', group_by=lambda job: job.payload['exam_id'])
+def post_submit(jobs):
+    attempts = ExamAttempt.objects.select_related('exam', 'student__user').in_bulk(
+        [job.payload['attempt_id'] for job in jobs]
+    )
+
+    # Coalesced per exam: a single submission is slotted in, a burst of
+    # them costs one rank rebuild for the whole tick
+    unranked = [attempt for attempt in attempts.values() if attempt.rank is None]
+    if len(unranked) == 1:
+        insert_exam_rank(unranked[0])
+    elif unranked:
+        calculate_exam_ranks(jobs[0].payload['exam_id'])
+
+    run_each(jobs, lambda job: finalize_attempt(attempts.get(job.payload['attempt_id'])))
+
+
+def finalize_attempt(attempt):
+    if attempt is None:
+        return
+
+    exam = attempt.exam
+    student = attempt.student
+
+    # Update student points and the leaderboards; a retried job stops here
+    if not record_attempt(attempt):
+        return
+
+    # Check and award achievements
+    check_achievements(student)
+
+    # Send notification
+    notify(
+        student.user,
+        'result_published',
+        'Exam Completed',
+        f'You scored {attempt.score}/{exam.total_marks} ({attempt.percentage:.2f}%) in {exam.title}'
+    )
+
+
+def check_achievements(student):
+    # Rules come from the in-process cache and read the rollup row only
+    return award_achievements(student.pk, StudentStats.objects.filter(student=student).first())
@@ -0,0 +1,529 @@
+import re
+from datetime import timedelta
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import SubprotocolTokenAuthMiddleware
+from .autosave import AttemptAlreadySubmitted, autosave_answers
+from .blueprints import invalidate_bank
+from .consumers import IDLE, NOT_FOUND, SUBMITTED, UNAUTHENTICATED, UNAVAILABLE
+from .grading import grade_attempt
+from .item_analysis import compute_item_analysis
+from .leaderboards import GLOBAL_LEADERBOARD_ORDERING, EXAM_LEADERBOARD_ORDERING
+from .models import (
+    User, Student, Category, Exam, Question, ExamAttempt, StudentAnswer, Notification, LeaderboardEntry,
+    ExamLeaderboardEntry,
+)
+from .notifications import notify, unread_count
+from .papers import paper_question_ids
+from .ranking import EXAM_RANK_ORDERING, attempts_ahead_of, students_ahead_of
+from .routing import websocket_urlpatterns
+
+# A SCAN that does not go through an index reads the whole table
+TABLE_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING (COVERING )?INDEX)')
+
+
+def seed_exams(size, prefix):
+    categories = Category.objects.bulk_create([Category(name=f'{prefix}-{i}') for i in range(size)])
+    exams = Exam.objects.bulk_create([
+        Exam(title=f'Exam {i}', category=categories[i], duration=30, total_marks=2, passing_marks=1, is_active=True)
+        for i in range(size)
+    ])
+    Question.objects.bulk_create([
+        Question(exam=exam, category=exam.category, question_text='?', option_a='a', option_b='b', correct_answer='A')
+        for exam in exams for _ in range(2)
+    ])
+    return exams
+
+
+def seed_exam(category, questions):
+    exam = Exam.objects.create(
+        title=f'{questions} questions', category=category, duration=30, total_marks=questions, passing_marks=1,
+        is_active=True,
+    )
+    Question.objects.bulk_create([
+        Question(exam=exam, category=category, question_text='?', option_a='a', option_b='b', correct_answer='A')
+        for _ in range(questions)
+    ])
+    return exam, list(exam.questions.order_by('id').values_list('id', flat=True))
+
+
+class QueryCountTests(TestCase):
+    """Hot endpoints run a fixed number of queries, however many rows they touch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', role='admin')
+        cls.user = User.objects.create(username='student')
+        cls.student = Student.objects.create(user=cls.user, name='Student', email='student@example.com', enrollment_no='S1')
+        cls.category = Category.objects.create(name='General')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertQueriesPerRequest(self, user, url, queries):
+        self.client.force_authenticate(user)
+        for prefix, size in (('few', 3), ('many', 30)):
+            seed_exams(size, f'{url}-{prefix}')
+            cache.clear()
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_exam_list(self):
+        self.assertQueriesPerRequest(self.admin, '/api/exams/?page_size=100', 2)
+
+    def test_category_list(self):
+        self.assertQueriesPerRequest(self.admin, '/api/categories/', 1)
+
+    def test_question_list(self):
+        self.assertQueriesPerRequest(self.admin, '/api/questions/?page_size=100', 1)
+
+    def test_global_leaderboard(self):
+        self.assertQueriesPerRequest(self.user, '/api/leaderboard/global_leaderboard/', 1)
+
+    def test_my_rank(self):
+        self.assertQueriesPerRequest(self.user, '/api/leaderboard/my-rank/', 2)
+
+    def test_exam_paper(self):
+        self.client.force_authenticate(self.user)
+        for size in (2, 20):
+            exam, _ = seed_exam(self.category, size)
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get(f'/api/exams/{exam.pk}/').status_code, 200)
+            # Served from the cached paper
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(f'/api/exams/{exam.pk}/').status_code, 200)
+
+    def test_save_and_submit(self):
+        self.client.force_authenticate(self.user)
+        # The first submission creates the stats rollup row; later ones update it
+        warmup, question_ids = seed_exam(self.category, 1)
+        attempt = self.client.post('/api/students/start-exam/', {'exam_id': warmup.pk}, format='json').json()
+        self.client.post('/api/students/submit-exam/', {'attempt_id': attempt['id']}, format='json')
+
+        for size in (2, 20):
+            exam, question_ids = seed_exam(self.category, size)
+            attempt = self.client.post('/api/students/start-exam/', {'exam_id': exam.pk}, format='json').json()
+            answers = [{'question_id': question_id, 'selected_answer': 'A'} for question_id in question_ids]
+
+            with self.assertNumQueries(6):
+                response = self.client.post('/api/students/save-answers/', {
+                    'attempt_id': attempt['id'], 'answers': answers[:size // 2],
+                }, format='json')
+            self.assertEqual(response.json(), {'saved': size // 2})
+
+            with self.assertNumQueries(14):
+                response = self.client.post('/api/students/submit-exam/', {
+                    'attempt_id': attempt['id'], 'answers': answers[size // 2:],
+                }, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['score'], size)
+
+
+class AttemptAccessTests(TestCase):
+    """Only the owner can save or submit an attempt, and only while it is open."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.exam, cls.question_ids = seed_exam(Category.objects.create(name='General'), 2)
+        cls.owner, cls.other = (User.objects.create(username=name) for name in ('owner', 'other'))
+        for i, user in enumerate((cls.owner, cls.other)):
+            Student.objects.create(user=user, name=user.username, email=f'{user.username}@example.com', enrollment_no=str(i))
+
+    def setUp(self):
+        cache.clear()
+        self.attempt = ExamAttempt.objects.create(student=self.owner.student_profile, exam=self.exam, attempt_number=1)
+        self.client = APIClient()
+
+    def test_submit_someone_elses_attempt(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.post('/api/students/submit-exam/', {'attempt_id': self.attempt.pk}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, 'in_progress')
+
+    def test_autosave_racing_the_submission_is_refused(self):
+        # The request checked the attempt before it was graded
+        stale = ExamAttempt.objects.select_related('exam').get(pk=self.attempt.pk)
+        grade_attempt(self.attempt, [{'question_id': self.question_ids[0], 'selected_answer': 'A'}])
+
+        with self.assertRaises(AttemptAlreadySubmitted):
+            autosave_answers(stale, [{'question_id': self.question_ids[0], 'selected_answer': 'B'}])
+        answer = StudentAnswer.objects.get(attempt=self.attempt, question_id=self.question_ids[0])
+        self.assertEqual((answer.selected_answer, answer.is_correct), ('A', True))
+
+    def test_submit_survives_channel_layer_outage(self):
+        self.client.force_authenticate(self.owner)
+        with mock.patch('api.consumers.get_channel_layer', side_effect=ConnectionError), \
+                self.assertLogs('api.consumers', 'ERROR'):
+            response = self.client.post('/api/students/submit-exam/', {'attempt_id': self.attempt.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, 'completed')
+
+
+class ExportErrorTests(TestCase):
+    """Errors of the streaming exports come back as JSON whatever format was asked for."""
+
+    def test_errors_are_json(self):
+        admin = User.objects.create(username='admin', role='admin')
+        client = APIClient()
+        for user, url, code in (
+            (None, '/api/results/exam/999/?format=csv', 401),
+            (admin, '/api/results/exam/999/?format=csv', 404),
+            (admin, '/api/results/exam/999/?format=jsonl', 404),
+        ):
+            client.force_authenticate(user)
+            response = client.get(url)
+            self.assertEqual(response.status_code, code)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('detail', response.json())
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='reader', role='student')
+
+    def test_unread_counter_moves_on_commit(self):
+        self.assertEqual(unread_count(self.user.pk), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            notify(self.user, 'general', 'Hello', 'World')
+            self.assertEqual(unread_count(self.user.pk), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_stream_errors_are_json(self):
+        client = APIClient()
+        response = client.get('/api/notifications/stream/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        client.force_authenticate(self.user)
+        response = client.get('/api/notifications/stream/', HTTP_LAST_EVENT_ID='x')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'Invalid last event id'})
+
+
+class VariantExamTests(TestCase):
+    """Blueprint exams drawing a per-student paper from a larger pool."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='General')
+        cls.exam, cls.pool = seed_exam(category, 8)
+        cls.exam.blueprint = [{'category': None, 'difficulty': None, 'count': 4}]
+        cls.exam.total_marks = 4
+        cls.exam.save()
+        cls.users = [User.objects.create(username=f'student-{i}') for i in range(12)]
+        for i, user in enumerate(cls.users):
+            Student.objects.create(user=user, name=user.username, email=f'{user.username}@example.com', enrollment_no=str(i))
+
+    def setUp(self):
+        cache.clear()
+
+    def sit(self, user, wrong=0):
+        # Answers the student's own paper, the first `wrong` questions incorrectly
+        attempt = ExamAttempt.objects.create(student=user.student_profile, exam=self.exam, attempt_number=1)
+        paper = paper_question_ids(self.exam, seed=user.pk)
+        grade_attempt(attempt, [
+            {'question_id': question_id, 'selected_answer': 'B' if index < wrong else 'A'}
+            for index, question_id in enumerate(paper)
+        ])
+        return paper
+
+    def test_questions_count_is_the_paper_size(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        exams = client.get('/api/exams/').json()['results']
+        self.assertEqual([exam['questions_count'] for exam in exams if exam['id'] == self.exam.pk], [4])
+
+    def test_autosave_keeps_only_the_students_paper(self):
+        user = self.users[0]
+        attempt = ExamAttempt.objects.create(student=user.student_profile, exam=self.exam, attempt_number=1)
+        paper = set(paper_question_ids(self.exam, seed=user.pk))
+        saved = autosave_answers(attempt, [{'question_id': question_id, 'selected_answer': 'A'} for question_id in self.pool])
+        self.assertEqual(saved, len(paper))
+        self.assertEqual(set(attempt.answers.values_list('question_id', flat=True)), paper)
+
+    def test_generate_seed(self):
+        category = Category.objects.create(name='Bank')
+        Question.objects.bulk_create([
+            Question(category=category, question_text='?', option_a='a', option_b='b', correct_answer='A')
+            for _ in range(6)
+        ])
+        invalidate_bank()
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='admin', role='admin'))
+        body = {
+            'title': 'Generated', 'category': category.pk, 'duration': 30, 'passing_marks': 1,
+            'blueprint': [{'category': category.pk, 'count': 3}], 'dry_run': True,
+        }
+
+        draws = [client.post('/api/exams/generate/', {**body, 'seed': 0}, format='json').json() for _ in range(2)]
+        self.assertEqual(draws[0]['seed'], 0)
+        self.assertEqual(draws[0]['question_ids'], draws[1]['question_ids'])
+        response = client.post('/api/exams/generate/', {**body, 'seed': -1}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_pool_smaller_than_the_blueprint(self):
+        self.sit(self.users[0])
+        attempt = ExamAttempt.objects.create(student=self.users[1].student_profile, exam=self.exam, attempt_number=1)
+        for question in self.exam.questions.order_by('id')[3:]:
+            question.delete()
+        client = APIClient()
+
+        client.force_authenticate(self.users[1])
+        self.assertEqual(client.get(f'/api/exams/{self.exam.pk}/').status_code, 409)
+        answers = [{'question_id': self.pool[0], 'selected_answer': 'A'}]
+        for url, body in (
+            ('/api/students/resume-exam/', {'attempt_id': attempt.pk}),
+            ('/api/students/save-answers/', {'attempt_id': attempt.pk, 'answers': answers}),
+            ('/api/students/submit-exam/', {'attempt_id': attempt.pk, 'answers': answers}),
+        ):
+            self.assertEqual(client.post(url, body, format='json').status_code, 409, url)
+        client.force_authenticate(self.users[2])
+        response = client.post('/api/students/start-exam/', {'exam_id': self.exam.pk}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ExamAttempt.objects.filter(student__user=self.users[2]).exists())
+
+        analysis = compute_item_analysis(self.exam)
+        self.assertEqual(analysis['attempts'], 1)
+
+    def test_item_analysis_only_counts_presented_questions(self):
+        presented = {question_id: 0 for question_id in self.pool}
+        for user in self.users:
+            for question_id in self.sit(user):
+                presented[question_id] += 1
+
+        analysis = compute_item_analysis(self.exam)
+        for item in analysis['items']:
+            self.assertEqual(item['attempts'], presented[item['question_id']])
+            if item['attempts']:
+                # Everyone answered every question they were shown correctly
+                self.assertEqual(item['difficulty_index'], 1.0)
+                self.assertEqual(item['option_frequencies']['omitted'], 0.0)
+                self.assertNotIn('negative_discrimination', item['flags'])
+                self.assertNotIn('too_hard', item['flags'])
+        self.assertEqual(analysis['mean_score'], 4.0)
+
+    def test_item_analysis_reliability_of_variant_papers(self):
+        for index, user in enumerate(self.users):
+            self.sit(user, wrong=index % 5)
+        analysis = compute_item_analysis(self.exam)
+        self.assertIsNotNone(analysis['kr20'])
+        self.assertGreater(analysis['kr20'], 0)
+
+    def test_item_analysis_ignores_attempts_completed_mid_read(self):
+        for user in self.users[:3]:
+            self.sit(user)
+        late = ExamAttempt.objects.filter(exam=self.exam).latest('id')
+        filter_attempts = ExamAttempt.objects.filter
+        # The last attempt completes between the attempts and the answers queries
+        with mock.patch.object(
+            ExamAttempt.objects, 'filter', side_effect=lambda *args, **kwargs: filter_attempts(*args, **kwargs).exclude(pk=late.pk)
+        ):
+            analysis = compute_item_analysis(self.exam)
+        self.assertEqual(analysis['attempts'], 2)
+        self.assertEqual(sum(item['attempts'] for item in analysis['items']), 8)
+
+
+def hot_queries():
+    """(query, indexes any of which may serve it) by name.
+
+    Parameter values do not matter to the planner, only the shape of the query.
+    """
+    student = Student(id=1, total_points=100)
+    attempt = ExamAttempt(id=1, exam_id=1, score=10, time_spent=300)
+    return {
+        'start exam: attempts of a student at an exam': (
+            ExamAttempt.objects.filter(student_id=1, exam_id=1).order_by(), {'attempt_student_exam_idx'},
+        ),
+        'my attempts page': (
+            ExamAttempt.objects.filter(student_id=1).order_by('-start_time', '-id')[:20], {'attempt_student_start_idx'},
+        ),
+        'completed attempts of a student': (
+            ExamAttempt.objects.filter(student_id=1, status='completed').order_by().values_list('percentage'),
+            {'attempt_student_status_idx'},
+        ),
+        'exam ranking': (
+            ExamAttempt.objects.filter(exam_id=1, status='completed').order_by(*EXAM_RANK_ORDERING),
+            {'attempt_exam_rank_idx'},
+        ),
+        # Both indexes lead with (exam, status); without statistics the planner may take either
+        'attempts ahead of an attempt': (
+            attempts_ahead_of(attempt), {'attempt_exam_rank_idx', 'attempt_exam_start_idx'},
+        ),
+        'exam results page': (
+            ExamAttempt.objects.filter(exam_id=1, status='completed').order_by('-start_time', '-id')[:20],
+            {'attempt_exam_start_idx'},
+        ),
+        'students ahead in points': (students_ahead_of(student), {'student_points_rank_idx'}),
+        'answers of an attempt': (StudentAnswer.objects.filter(attempt_id=1), {'api_studentanswer_attempt_id_458a205e'}),
+        'global leaderboard': (
+            LeaderboardEntry.objects.order_by(*GLOBAL_LEADERBOARD_ORDERING)[:50], {'leaderboard_points_idx'},
+        ),
+        'exam leaderboard': (
+            ExamLeaderboardEntry.objects.filter(exam_id=1).order_by(*EXAM_LEADERBOARD_ORDERING)[:50],
+            {'exam_leaderboard_idx'},
+        ),
+        'notifications page': (
+            Notification.objects.filter(user_id=1).order_by('-created_at', '-id')[:20],
+            {'notification_user_created_idx'},
+        ),
+        'unread notification count': (
+            Notification.objects.filter(user_id=1, is_read=False).order_by(), {'notification_unread_idx'},
+        ),
+    }
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plans are read from SQLite EXPLAIN QUERY PLAN output')
+class QueryPlanTests(TestCase):
+    """Hot attempt, answer, leaderboard and notification queries are served by their indexes."""
+
+    def test_hot_queries_use_their_indexes(self):
+        for name, (queryset, indexes) in hot_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertEqual(TABLE_SCAN.findall(plan), [], plan)
+                used = set(re.findall(r'USING (?:COVERING )?INDEX (\w+)', plan))
+                self.assertTrue(used, plan)
+                self.assertLessEqual(used, indexes, plan)
+
+
+@override_settings(EXAM_CHANNEL={'TICK_SECONDS': 1, 'HEARTBEAT_TIMEOUT': 60})
+class ExamAttemptConsumerTests(TransactionTestCase):
+    """The exam WebSocket over the in-memory channel layer."""
+
+    application = SubprotocolTokenAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='student')
+        self.student = Student.objects.create(user=self.user, name='Student', email='student@example.com', enrollment_no='S1')
+        self.exam, self.question_ids = seed_exam(Category.objects.create(name='General'), 2)
+        self.attempt = ExamAttempt.objects.create(student=self.student, exam=self.exam, attempt_number=1)
+
+    def start_seconds_ago(self, seconds):
+        ExamAttempt.objects.filter(pk=self.attempt.pk).update(start_time=timezone.now() - timedelta(seconds=seconds))
+
+    def communicator(self, attempt_id=None, token=True):
+        subprotocols = ['bearer', str(AccessToken.for_user(self.user))] if token else []
+        return WebsocketCommunicator(
+            self.application, f'/ws/attempts/{attempt_id or self.attempt.pk}/', subprotocols=subprotocols
+        )
+
+    async def connect(self):
+        communicator = self.communicator()
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'bearer')
+        state = await communicator.receive_json_from()
+        self.assertEqual(state['type'], 'state')
+        return communicator, state
+
+    async def receive_type(self, communicator, message_type, timeout=5):
+        # Skips the ticks in between
+        while True:
+            message = await communicator.receive_json_from(timeout)
+            if message['type'] == message_type:
+                return message
+
+    async def test_rejects_missing_token(self):
+        connected, code = await self.communicator(token=False).connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, UNAUTHENTICATED)
+
+    async def test_rejects_someone_elses_attempt(self):
+        connected, code = await self.communicator(attempt_id=self.attempt.pk + 1).connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, NOT_FOUND)
+
+    async def test_rejects_undrawable_paper(self):
+        # Blueprint of three questions over a pool of two
+        await sync_to_async(Exam.objects.filter(pk=self.exam.pk).update)(
+            blueprint=[{'category': None, 'difficulty': None, 'count': 3}]
+        )
+        connected, code = await self.communicator().connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, UNAVAILABLE)
+
+    async def test_state_and_answers(self):
+        communicator, state = await self.connect()
+        self.assertEqual(sorted(state['question_order']), self.question_ids)
+        self.assertEqual(state['status'], 'in_progress')
+
+        await communicator.send_json_to({'type': 'answers', 'answers': [
+            {'question_id': self.question_ids[0], 'selected_answer': 'A'},
+        ]})
+        self.assertEqual(await self.receive_type(communicator, 'saved'), {'type': 'saved', 'saved': 1})
+        saved = await sync_to_async(list)(StudentAnswer.objects.filter(attempt=self.attempt).values_list(
+            'question_id', 'selected_answer'
+        ))
+        self.assertEqual(saved, [(self.question_ids[0], 'A')])
+        await communicator.disconnect()
+
+    async def test_ticks_then_submits_at_time_up(self):
+        await sync_to_async(self.start_seconds_ago)(self.exam.duration * 60 - 2)
+        communicator, state = await self.connect()
+        self.assertLessEqual(state['remaining_seconds'], 2)
+
+        tick = await communicator.receive_json_from(5)
+        self.assertEqual(tick['type'], 'tick')
+        submitted = await self.receive_type(communicator, 'submitted')
+        self.assertEqual(submitted['reason'], 'time_up')
+        self.assertEqual(submitted['result']['unanswered'], 2)
+        self.assertEqual((await communicator.receive_output(5))['code'], SUBMITTED)
+
+        await sync_to_async(self.attempt.refresh_from_db)()
+        self.assertEqual(self.attempt.status, 'completed')
+
+    async def test_rest_pause_stops_the_clock(self):
+        await sync_to_async(self.start_seconds_ago)(self.exam.duration * 60 - 2)
+        communicator, _ = await self.connect()
+
+        client = APIClient()
+        await sync_to_async(client.force_authenticate)(self.user)
+        response = await sync_to_async(client.post)(
+            '/api/students/pause-exam/', {'attempt_id': self.attempt.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        while (tick := await communicator.receive_json_from(5))['status'] != 'paused':
+            pass
+
+        # Well past the original deadline the attempt is still paused, not graded
+        for _ in range(3):
+            tick = await self.receive_type(communicator, 'tick')
+            self.assertEqual(tick['status'], 'paused')
+            self.assertGreater(tick['remaining_seconds'], 0)
+        await sync_to_async(self.attempt.refresh_from_db)()
+        self.assertEqual(self.attempt.status, 'paused')
+        await communicator.disconnect()
+
+    async def test_pause_unseen_by_the_socket_is_checked_before_grading(self):
+        # As when the pause is handled by another process without a shared channel layer
+        await sync_to_async(self.start_seconds_ago)(self.exam.duration * 60 - 2)
+        communicator, _ = await self.connect()
+        attempt = await sync_to_async(ExamAttempt.objects.select_related('exam').get)(pk=self.attempt.pk)
+        await sync_to_async(attempt.pause)()
+
+        for _ in range(4):
+            tick = await self.receive_type(communicator, 'tick')
+        self.assertEqual(tick['status'], 'paused')
+        await sync_to_async(self.attempt.refresh_from_db)()
+        self.assertEqual(self.attempt.status, 'paused')
+        await communicator.disconnect()
+
+    @override_settings(EXAM_CHANNEL={'TICK_SECONDS': 1, 'HEARTBEAT_TIMEOUT': 0})
+    async def test_closes_idle_sockets(self):
+        communicator, _ = await self.connect()
+        self.assertEqual((await communicator.receive_output(5))['code'], IDLE)
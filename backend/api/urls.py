@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    register, login, ExamViewSet, QuestionViewSet,
+    register, login, perf_summary, ExamViewSet, QuestionViewSet,
     StudentViewSet, ResultViewSet, CategoryViewSet,
     LeaderboardViewSet, NotificationViewSet, AchievementViewSet
 )
@@ -19,5 +19,6 @@ router.register(r'achievements', AchievementViewSet, basename='achievement')
 urlpatterns = [
     path('auth/register', register, name='register'),
     path('auth/login', login, name='login'),
+    path('_perf', perf_summary, name='perf-summary'),
     path('', include(router.urls)),
 ]
@@ -1,24 +1,48 @@
+import secrets
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.utils import timezone
-from django.db.models import Avg, Count, Sum, Q
+from django.utils.dateparse import parse_date
+from django.db.models import Avg, Count, Max, Sum, Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from .models import (
     User, Student, Exam, Question, ExamAttempt, StudentAnswer,
-    Category, Notification, Achievement, StudentAchievement
+    Category, Notification, Achievement, StudentAchievement,
+    LeaderboardEntry, ExamLeaderboardEntry
 )
 from .serializers import (
     UserSerializer, RegisterSerializer, StudentSerializer, StudentProfileSerializer,
     ExamSerializer, ExamWithQuestionsSerializer, QuestionSerializer,
-    ExamAttemptSerializer, ExamAttemptDetailSerializer, ExamSubmitSerializer, 
+    ExamAttemptSerializer, ExamAttemptDetailSerializer, ExamSubmitSerializer,
+    AnswerSaveSerializer, AnswersSaveSerializer,
     ResultSerializer, CategorySerializer, NotificationSerializer,
     AchievementSerializer, StudentAchievementSerializer, LeaderboardSerializer,
-    AnalyticsSerializer
+    RankedStudentSerializer, AnalyticsSerializer
 )
-import random
+from .grading import grade_attempt, submission_summary, AttemptAlreadySubmitted
+from .ranking import global_rank_of, students_around
+from .leaderboards import GLOBAL_LEADERBOARD_ORDERING, EXAM_LEADERBOARD_ORDERING
+from .papers import paper_question_ids, render_paper
+from .autosave import autosave_answers, resume_snapshot
+from .consumers import send_to_attempt
+from .stats import stats_summary
+from .search import search_questions
+from .importers import ImportFormatError, detect_format, import_questions
+from .exports import EXPORTERS, completed_results, result_row
+from .renderers import CSVRenderer, JSONLinesRenderer, EventStreamRenderer
+from .conditional import conditional_response, exam_etag, exam_list_etag
+from .perf import perf_setting, stats as perf_stats
+from .item_analysis import item_analysis
+from .blueprints import BlueprintError, clean_blueprint, generate_exam, sample_bank
+from .pagination import CursorPagination, AttemptCursorPagination, QuestionCursorPagination, paginate
+from .notifications import broadcast, mark_read, notification_snapshot, notification_stream, unread_count
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -58,12 +82,54 @@ def login(request):
     
     return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
+def parse_query_date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
+
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_authenticated and request.user.role == 'admin'
 
+def related_count(model, field):
+    # Correlated COUNT subquery; unlike Count() joins it does not multiply rows
+    counts = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk'))
+    return Coalesce(Subquery(counts.values('count')), 0)
+
+def paper_unavailable():
+    # A blueprint exam whose pool no longer has enough questions to draw a paper
+    return Response({'detail': 'This exam does not have enough questions for its blueprint'}, status=status.HTTP_409_CONFLICT)
+
+def exams_with_counts(queryset):
+    return queryset.select_related('category').annotate(questions_count=related_count(Question, 'exam'))
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdmin])
+def perf_summary(request):
+    # Stats of the process that served this request; DELETE clears them
+    if request.method == 'DELETE':
+        perf_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    endpoints = perf_stats.summary()
+    return Response({
+        'enabled': perf_setting('ENABLED'),
+        'sample_rate': perf_setting('SAMPLE_RATE'),
+        'slowest': sorted(endpoints, key=lambda row: row['p95_ms'], reverse=True)[:limit],
+        'most_queries': sorted(endpoints, key=lambda row: row['queries_mean'], reverse=True)[:limit],
+    })
+
 class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(
+        exams_count=related_count(Exam, 'category'),
+        questions_count=related_count(Question, 'category'),
+    )
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
     
@@ -76,6 +142,7 @@ class ExamViewSet(viewsets.ModelViewSet):
     queryset = Exam.objects.filter(is_active=True)
     serializer_class = ExamSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -95,10 +162,24 @@ class ExamViewSet(viewsets.ModelViewSet):
         return ExamSerializer
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'item_analysis', 'generate']:
             return [IsAdmin()]
         return [IsAuthenticated()]
     
+    def conditional_list(self, request, queryset, paginate=False):
+        # Polled constantly by dashboards: unchanged lists are answered with 304
+        def build():
+            exams = exams_with_counts(queryset)
+            if paginate:
+                serializer = self.get_serializer(self.paginate_queryset(exams), many=True)
+                return self.get_paginated_response(serializer.data)
+            return Response(self.get_serializer(exams, many=True).data)
+        
+        return conditional_response(request, exam_list_etag(request, queryset), build)
+    
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list(request, self.get_queryset(), paginate=True)
+    
     def retrieve(self, request, *args, **kwargs):
         exam = self.get_object()
         
@@ -110,14 +191,16 @@ class ExamViewSet(viewsets.ModelViewSet):
                 if exam.is_expired():
                     return Response({'detail': 'Exam has expired'}, status=status.HTTP_403_FORBIDDEN)
         
-        serializer = self.get_serializer(exam)
-        data = serializer.data
-        
-        # Shuffle questions if enabled
-        if exam.shuffle_questions and 'questions' in data:
-            random.shuffle(data['questions'])
-        
-        return Response(data)
+        # Cached pre-rendered paper, shuffled per student when enabled
+        try:
+            return conditional_response(
+                request,
+                exam_etag(exam, seed=request.user.pk),
+                lambda: HttpResponse(render_paper(exam, seed=request.user.pk), content_type='application/json'),
+                last_modified=exam.updated_at,
+            )
+        except BlueprintError:
+            return paper_unavailable()
     
     def destroy(self, request, *args, **kwargs):
         exam = self.get_object()
@@ -125,12 +208,65 @@ class ExamViewSet(viewsets.ModelViewSet):
         exam.save()
         return Response({'message': 'Exam deleted successfully'})
     
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Build an exam from a blueprint over the question bank.
+        
+        blueprint: [{category, difficulty, count}]; the sampled bank questions
+        are copied into the new exam. With variants=true, pool_size times as
+        many are copied and every student draws their own paper from them.
+        The seed (random when omitted) reproduces the same draw.
+        """
+        data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
+        variants = str(data.pop('variants', 'false')).lower() in ('1', 'true')
+        dry_run = str(data.pop('dry_run', 'false')).lower() in ('1', 'true')
+        try:
+            sections = clean_blueprint(data.pop('blueprint', None))
+            seed = data.pop('seed', None)
+            seed = secrets.randbelow(2 ** 31) if seed is None or seed == '' else int(seed)
+            pool_size = int(data.pop('pool_size', 3)) if variants else 1
+            if seed < 0 or pool_size < 1:
+                raise ValueError()
+            question_ids = sample_bank(sections, seed, multiplier=pool_size)
+        except BlueprintError as e:
+            return Response({'blueprint': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, ValueError):
+            return Response({'detail': 'seed must be a non-negative integer and pool_size a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if 'total_marks' not in data:
+            # One student's share of the draw: the first count picks of every section
+            marks = dict(Question.objects.filter(pk__in=question_ids).values_list('id', 'marks'))
+            offsets = [0]
+            for section in sections:
+                offsets.append(offsets[-1] + section['count'] * pool_size)
+            data['total_marks'] = sum(
+                marks[question_id]
+                for section, start in zip(sections, offsets)
+                for question_id in question_ids[start:start + section['count']]
+            )
+        
+        serializer = ExamSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if dry_run:
+            return Response({'seed': seed, 'question_ids': question_ids, 'total_marks': data['total_marks']})
+        
+        exam = generate_exam(serializer, sections, question_ids, variants=variants)
+        return Response({**ExamSerializer(exam).data, 'seed': seed}, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        """Per-question difficulty, discrimination and option shares, and KR-20 of the exam."""
+        analysis, pending = item_analysis(self.get_object())
+        if analysis is None:
+            return Response({'detail': 'Item analysis is being computed', 'pending': True}, status=status.HTTP_202_ACCEPTED)
+        return Response({**analysis, 'pending': pending})
+    
     @action(detail=False, methods=['get'], url_path='upcoming')
     def upcoming(self, request):
         now = timezone.now()
         exams = Exam.objects.filter(is_active=True, start_date__gt=now)
-        serializer = self.get_serializer(exams, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(request, exams)
     
     @action(detail=False, methods=['get'], url_path='active')
     def active(self, request):
@@ -140,13 +276,13 @@ class ExamViewSet(viewsets.ModelViewSet):
             start_date__lte=now,
             end_date__gte=now
         )
-        serializer = self.get_serializer(exams, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(request, exams)
 
 class QuestionViewSet(viewsets.ModelViewSet):
-    queryset = Question.objects.all()
+    queryset = Question.objects.select_related('category')
     serializer_class = QuestionSerializer
     permission_classes = [IsAdmin]
+    pagination_class = QuestionCursorPagination
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -165,16 +301,72 @@ class QuestionViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], url_path='exam/(?P<exam_id>[^/.]+)')
     def by_exam(self, request, exam_id=None):
-        questions = Question.objects.filter(exam_id=exam_id)
+        questions = self.paginate_queryset(self.queryset.filter(exam_id=exam_id))
         serializer = self.get_serializer(questions, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'], url_path='bank')
     def question_bank(self, request):
         # Questions not assigned to any exam
-        questions = Question.objects.filter(exam__isnull=True)
+        questions = self.paginate_queryset(self.queryset.filter(exam__isnull=True))
         serializer = self.get_serializer(questions, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({'detail': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        count, hits = search_questions(
+            query,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            exam=request.query_params.get('exam'),
+            category=request.query_params.get('category'),
+            difficulty=request.query_params.get('difficulty'),
+        )
+        results = []
+        for question, relevance in hits:
+            data = self.get_serializer(question).data
+            data['relevance'] = relevance
+            results.append(data)
+        
+        return Response({
+            'count': count,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Upload a CSV or JSON Lines file as "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            fmt = detect_format(upload.name, request.data.get('format'))
+        except ImportFormatError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        exam = None
+        if request.data.get('exam'):
+            try:
+                exam = Exam.objects.get(pk=request.data['exam'])
+            except (Exam.DoesNotExist, ValueError):
+                return Response({'detail': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        report = import_questions(
+            upload.file,
+            fmt,
+            exam=exam,
+            dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes'),
+        )
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
 
 class StudentViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -183,6 +375,7 @@ class StudentViewSet(viewsets.ViewSet):
     def me(self, request):
         try:
             student = Student.objects.get(user=request.user)
+            student.rank = global_rank_of(student)
             serializer = StudentProfileSerializer(student)
             return Response(serializer.data)
         except Student.DoesNotExist:
@@ -217,6 +410,13 @@ class StudentViewSet(viewsets.ViewSet):
             if attempts_count >= exam.max_attempts:
                 return Response({'detail': f'Maximum {exam.max_attempts} attempts allowed'}, status=status.HTTP_403_FORBIDDEN)
         
+        if exam.blueprint:
+            # The pool may have shrunk since the blueprint was validated
+            try:
+                paper_question_ids(exam, seed=request.user.pk)
+            except BlueprintError:
+                return paper_unavailable()
+        
         # Get attempt number
         attempt_number = ExamAttempt.objects.filter(student=student, exam=exam).count() + 1
         
@@ -235,128 +435,102 @@ class StudentViewSet(viewsets.ViewSet):
         attempt_id = request.data.get('attempt_id')
         try:
             attempt = ExamAttempt.objects.get(id=attempt_id)
-            attempt.status = 'paused'
-            attempt.pause_time = timezone.now()
-            attempt.save()
+            attempt.pause()
+            send_to_attempt(attempt.id, {'type': 'attempt.status', 'paused': True})
             return Response({'message': 'Exam paused successfully'})
         except ExamAttempt.DoesNotExist:
             return Response({'detail': 'Exam attempt not found'}, status=status.HTTP_404_NOT_FOUND)
     
     @action(detail=False, methods=['post'], url_path='resume-exam')
     def resume_exam(self, request):
-        attempt_id = request.data.get('attempt_id')
+        attempt, error = self.get_open_attempt(request, request.data.get('attempt_id'))
+        if error:
+            return error
+        
+        now = timezone.now()
+        attempt.resume(now)
+        send_to_attempt(attempt.id, {'type': 'attempt.status', 'paused': False})
+        
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id)
-            attempt.status = 'in_progress'
-            attempt.resume_time = timezone.now()
-            attempt.save()
-            return Response({'message': 'Exam resumed successfully'})
-        except ExamAttempt.DoesNotExist:
-            return Response({'detail': 'Exam attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+            snapshot = resume_snapshot(attempt, seed=request.user.pk)
+        except BlueprintError:
+            return paper_unavailable()
+        return Response({
+            'message': 'Exam resumed successfully',
+            'attempt_id': attempt.id,
+            'exam_id': attempt.exam_id,
+            'status': attempt.status,
+            'question_order': snapshot['question_order'],
+            'answers': snapshot['answers'],
+            'remaining_seconds': attempt.remaining_seconds(now),
+            'server_time': now,
+        })
     
-    @action(detail=False, methods=['post'], url_path='submit-exam')
-    def submit_exam(self, request):
-        serializer = ExamSubmitSerializer(data=request.data)
+    def get_open_attempt(self, request, attempt_id):
+        try:
+            attempt = ExamAttempt.objects.select_related('exam__category', 'student').get(id=attempt_id, student__user=request.user)
+        except ExamAttempt.DoesNotExist:
+            return None, Response({'detail': 'Exam attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+        if attempt.status == 'completed':
+            return None, Response({'detail': 'Exam attempt already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+        return attempt, None
+    
+    @action(detail=False, methods=['post'], url_path='save-answer')
+    def save_answer(self, request):
+        serializer = AnswerSaveSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        attempt_id = serializer.validated_data['attempt_id']
-        answers = serializer.validated_data['answers']
+        attempt, error = self.get_open_attempt(request, serializer.validated_data['attempt_id'])
+        if error:
+            return error
         
         try:
-            attempt = ExamAttempt.objects.get(id=attempt_id)
-        except ExamAttempt.DoesNotExist:
-            return Response({'detail': 'Exam attempt not found'}, status=status.HTTP_404_NOT_FOUND)
+            saved = autosave_answers(attempt, [serializer.validated_data])
+        except AttemptAlreadySubmitted:
+            return Response({'detail': 'Exam attempt already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+        except BlueprintError:
+            return paper_unavailable()
+        return Response({'saved': saved})
+    
+    @action(detail=False, methods=['post'], url_path='save-answers')
+    def save_answers(self, request):
+        serializer = AnswersSaveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        exam = attempt.exam
-        correct_count = 0
-        wrong_count = 0
-        total_score = 0
+        attempt, error = self.get_open_attempt(request, serializer.validated_data['attempt_id'])
+        if error:
+            return error
         
-        # Get all questions for this exam
-        all_questions = exam.questions.all()
-        answered_question_ids = [ans['question_id'] for ans in answers]
+        try:
+            saved = autosave_answers(attempt, serializer.validated_data['answers'])
+        except AttemptAlreadySubmitted:
+            return Response({'detail': 'Exam attempt already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+        except BlueprintError:
+            return paper_unavailable()
+        return Response({'saved': saved})
+    
+    @action(detail=False, methods=['post'], url_path='submit-exam')
+    def submit_exam(self, request):
+        serializer = ExamSubmitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        for answer_data in answers:
-            question = Question.objects.get(id=answer_data['question_id'])
-            selected = answer_data['selected_answer']
-            time_taken = answer_data.get('time_taken', 0)
-            
-            is_correct = question.correct_answer == selected
-            marks_obtained = 0
-            
-            if is_correct:
-                correct_count += 1
-                marks_obtained = question.marks
-                total_score += question.marks
-            else:
-                wrong_count += 1
-                # Apply negative marking if enabled
-                if exam.negative_marking:
-                    marks_obtained = -exam.negative_marks
-                    total_score -= exam.negative_marks
-            
-            StudentAnswer.objects.create(
-                attempt=attempt,
-                question=question,
-                selected_answer=selected,
-                is_correct=is_correct,
-                time_taken=time_taken,
-                marks_obtained=marks_obtained
-            )
+        attempt, error = self.get_open_attempt(request, serializer.validated_data['attempt_id'])
+        if error:
+            return error
         
-        # Calculate unanswered questions
-        unanswered = all_questions.count() - len(answers)
-        
-        # Calculate time spent
-        time_spent = (timezone.now() - attempt.start_time).total_seconds()
-        
-        # Calculate percentage
-        percentage = (total_score / exam.total_marks) * 100 if exam.total_marks > 0 else 0
-        
-        attempt.end_time = timezone.now()
-        attempt.score = total_score
-        attempt.percentage = percentage
-        attempt.total_questions = all_questions.count()
-        attempt.correct_answers = correct_count
-        attempt.wrong_answers = wrong_count
-        attempt.unanswered = unanswered
-        attempt.time_spent = int(time_spent)
-        attempt.status = 'completed'
-        attempt.save()
-        
-        # Update student points
-        student = attempt.student
-        student.total_points += int(total_score)
-        student.save()
-        
-        # Calculate rank for this exam
-        calculate_exam_ranks(exam.id)
-        
-        # Update global ranks
-        update_global_ranks()
-        
-        # Check and award achievements
-        check_achievements(student)
-        
-        # Send notification
-        Notification.objects.create(
-            user=student.user,
-            notification_type='result_published',
-            title='Exam Completed',
-            message=f'You scored {total_score}/{exam.total_marks} ({percentage:.2f}%) in {exam.title}'
-        )
+        try:
+            grade_attempt(attempt, serializer.validated_data['answers'])
+        except AttemptAlreadySubmitted:
+            return Response({'detail': 'Exam attempt already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+        except BlueprintError:
+            return paper_unavailable()
         
-        return Response({
-            'message': 'Exam submitted successfully',
-            'score': total_score,
-            'percentage': percentage,
-            'correct_answers': correct_count,
-            'wrong_answers': wrong_count,
-            'unanswered': unanswered,
-            'total_questions': all_questions.count(),
-            'rank': attempt.rank
-        })
+        result = submission_summary(attempt)
+        send_to_attempt(attempt.id, {'type': 'attempt.submitted', 'reason': 'submitted', 'result': result})
+        return Response({'message': 'Exam submitted successfully', **result})
     
     @action(detail=False, methods=['get'], url_path='my-attempts')
     def my_attempts(self, request):
@@ -365,51 +539,72 @@ class StudentViewSet(viewsets.ViewSet):
         except Student.DoesNotExist:
             return Response({'detail': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        attempts = ExamAttempt.objects.filter(student=student)
-        serializer = ExamAttemptSerializer(attempts, many=True)
-        return Response(serializer.data)
+        attempts = ExamAttempt.objects.filter(student=student).select_related('student', 'exam')
+        return paginate(AttemptCursorPagination, attempts, request, self, ExamAttemptSerializer)
     
     @action(detail=False, methods=['get'], url_path='analytics')
     def analytics(self, request):
         try:
-            student = Student.objects.get(user=request.user)
+            student = Student.objects.select_related('stats').get(user=request.user)
         except Student.DoesNotExist:
             return Response({'detail': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        # Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD range on the submission date
+        date_from = request.query_params.get('from')
+        date_to = request.query_params.get('to')
         attempts = ExamAttempt.objects.filter(student=student, status='completed')
+        try:
+            if date_from:
+                attempts = attempts.filter(end_time__date__gte=parse_query_date(date_from))
+            if date_to:
+                attempts = attempts.filter(end_time__date__lte=parse_query_date(date_to))
+        except ValueError:
+            return Response({'detail': 'Dates must be formatted as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         
         total_exams = Exam.objects.filter(is_active=True).count()
-        completed_exams = attempts.count()
-        
-        avg_score = attempts.aggregate(Avg('percentage'))['percentage__avg'] or 0
-        highest_score = attempts.aggregate(Max('percentage'))['percentage__max'] or 0
-        total_time = attempts.aggregate(Sum('time_spent'))['time_spent__sum'] or 0
-        
-        # Category-wise performance
-        category_performance = {}
-        for attempt in attempts:
-            if attempt.exam.category:
-                cat_name = attempt.exam.category.name
-                if cat_name not in category_performance:
-                    category_performance[cat_name] = {'total': 0, 'sum': 0}
-                category_performance[cat_name]['total'] += 1
-                category_performance[cat_name]['sum'] += attempt.percentage
-        
-        for cat in category_performance:
-            category_performance[cat] = category_performance[cat]['sum'] / category_performance[cat]['total']
-        
-        # Difficulty-wise performance
-        difficulty_performance = {'easy': 0, 'medium': 0, 'hard': 0}
+        stats = getattr(student, 'stats', None)
+        if stats is not None and not (date_from or date_to):
+            # Whole history: read the rollup row instead of scanning attempts
+            summary = stats_summary(stats)
+        else:
+            totals = attempts.aggregate(
+                completed=Count('id'),
+                average=Avg('percentage'),
+                highest=Max('percentage'),
+                time_spent=Sum('time_spent')
+            )
+            
+            # Category-wise performance
+            category_performance = {
+                row['exam__category__name']: round(row['average'], 2)
+                for row in attempts.filter(exam__category__isnull=False)
+                    .values('exam__category__name')
+                    .annotate(average=Avg('percentage'))
+                    .order_by()
+            }
+            
+            # Difficulty-wise performance: share of answered questions that were correct
+            difficulty_performance = {'easy': 0, 'medium': 0, 'hard': 0}
+            difficulty_rows = StudentAnswer.objects.filter(attempt__in=attempts).values('question__difficulty').annotate(
+                correct=Count('id', filter=Q(is_correct=True)),
+                total=Count('id')
+            ).order_by()
+            for row in difficulty_rows:
+                difficulty_performance[row['question__difficulty']] = round(row['correct'] * 100 / row['total'], 2)
+            
+            summary = {
+                'completed_exams': totals['completed'],
+                'average_score': round(totals['average'] or 0, 2),
+                'highest_score': round(totals['highest'] or 0, 2),
+                'total_time_spent': totals['time_spent'] or 0,
+                'category_wise_performance': category_performance,
+                'difficulty_wise_performance': difficulty_performance,
+            }
         
         analytics_data = {
             'total_exams': total_exams,
-            'completed_exams': completed_exams,
-            'average_score': round(avg_score, 2),
-            'highest_score': round(highest_score, 2),
-            'total_time_spent': total_time,
-            'category_wise_performance': category_performance,
-            'difficulty_wise_performance': difficulty_performance,
-            'recent_attempts': ExamAttemptSerializer(attempts[:5], many=True).data
+            **summary,
+            'recent_attempts': attempts.select_related('student', 'exam')[:5]
         }
         
         serializer = AnalyticsSerializer(analytics_data)
@@ -469,75 +664,101 @@ class ResultViewSet(viewsets.ViewSet):
         serializer = ExamAttemptDetailSerializer(attempt)
         return Response(serializer.data)
     
-    @action(detail=False, methods=['get'], url_path='exam/(?P<exam_id>[^/.]+)', permission_classes=[IsAdmin])
+    @action(
+        detail=False, methods=['get'], url_path='exam/(?P<exam_id>[^/.]+)', permission_classes=[IsAdmin],
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, CSVRenderer, JSONLinesRenderer],
+    )
     def by_exam(self, request, exam_id=None):
-        attempts = ExamAttempt.objects.filter(exam_id=exam_id, status='completed')
-        exam = Exam.objects.get(id=exam_id)
-        
-        results = []
-        for attempt in attempts:
-            result_status = 'Pass' if attempt.score >= exam.passing_marks else 'Fail'
-            
-            results.append({
-                'attempt_id': attempt.id,
-                'exam_title': exam.title,
-                'student_name': attempt.student.name,
-                'score': attempt.score,
-                'total_marks': exam.total_marks,
-                'percentage': attempt.percentage,
-                'correct_answers': attempt.correct_answers,
-                'wrong_answers': attempt.wrong_answers,
-                'unanswered': attempt.unanswered,
-                'rank': attempt.rank,
-                'status': result_status,
-                'start_time': attempt.start_time,
-                'end_time': attempt.end_time,
-                'time_spent': attempt.time_spent
-            })
+        try:
+            exam = Exam.objects.get(id=exam_id)
+        except (Exam.DoesNotExist, ValueError):
+            return Response({'detail': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        export = request.accepted_renderer.format
+        if export in EXPORTERS:
+            # ?format=csv|jsonl streams every result; ?answers=1 adds the answer matrix
+            with_answers = request.query_params.get('answers') in ('1', 'true')
+            response = StreamingHttpResponse(
+                EXPORTERS[export](exam, with_answers=with_answers),
+                content_type=request.accepted_renderer.media_type,
+            )
+            response['Content-Disposition'] = f'attachment; filename="exam-{exam.id}-results.{export}"'
+            return response
         
-        serializer = ResultSerializer(results, many=True)
-        return Response(serializer.data)
+        paginator = AttemptCursorPagination()
+        attempts = paginator.paginate_queryset(completed_results(exam), request, view=self)
+        serializer = ResultSerializer([result_row(attempt, exam) for attempt in attempts], many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 class LeaderboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=False, methods=['get'])
     def global_leaderboard(self, request):
-        students = Student.objects.all().order_by('-total_points')[:50]
+        entries = LeaderboardEntry.objects.order_by(*GLOBAL_LEADERBOARD_ORDERING)[:50]
         
         leaderboard_data = []
-        for idx, student in enumerate(students, 1):
-            completed = ExamAttempt.objects.filter(student=student, status='completed').count()
-            avg_score = ExamAttempt.objects.filter(student=student, status='completed').aggregate(Avg('percentage'))['percentage__avg'] or 0
-            
+        for idx, entry in enumerate(entries, 1):
             leaderboard_data.append({
                 'rank': idx,
-                'student_name': student.name,
-                'total_points': student.total_points,
-                'exams_completed': completed,
-                'average_score': round(avg_score, 2),
-                'profile_image': student.profile_image.url if student.profile_image else None
+                'student_name': entry.student_name,
+                'total_points': entry.total_points,
+                'exams_completed': entry.exams_completed,
+                'average_score': round(entry.average_score, 2),
+                'profile_image': entry.profile_image
             })
         
         serializer = LeaderboardSerializer(leaderboard_data, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'], url_path='my-rank')
+    def my_rank(self, request):
+        try:
+            student = Student.objects.get(user=request.user)
+        except Student.DoesNotExist:
+            return Response({'detail': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        data = {
+            'rank': global_rank_of(student),
+            'student_id': student.id,
+            'student_name': student.name,
+            'total_points': student.total_points,
+        }
+        return Response(RankedStudentSerializer(data).data)
+    
+    @action(detail=False, methods=['get'], url_path='around-me')
+    def around_me(self, request):
+        try:
+            student = Student.objects.get(user=request.user)
+        except Student.DoesNotExist:
+            return Response({'detail': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            radius = min(max(int(request.query_params.get('radius', 5)), 0), 50)
+        except ValueError:
+            return Response({'detail': 'radius must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = [{
+            'rank': rank,
+            'student_id': neighbour.id,
+            'student_name': neighbour.name,
+            'total_points': neighbour.total_points,
+        } for rank, neighbour in students_around(student, radius)]
+        return Response(RankedStudentSerializer(data, many=True).data)
+    
     @action(detail=False, methods=['get'], url_path='exam/(?P<exam_id>[^/.]+)')
     def exam_leaderboard(self, request, exam_id=None):
-        attempts = ExamAttempt.objects.filter(
-            exam_id=exam_id, 
-            status='completed'
-        ).order_by('-score', 'time_spent')[:50]
+        entries = ExamLeaderboardEntry.objects.filter(exam_id=exam_id).order_by(*EXAM_LEADERBOARD_ORDERING)[:50]
         
         leaderboard_data = []
-        for idx, attempt in enumerate(attempts, 1):
+        for idx, entry in enumerate(entries, 1):
             leaderboard_data.append({
                 'rank': idx,
-                'student_name': attempt.student.name,
-                'total_points': int(attempt.score),
+                'student_name': entry.student_name,
+                'total_points': int(entry.score),
                 'exams_completed': 1,
-                'average_score': attempt.percentage,
-                'profile_image': attempt.student.profile_image.url if attempt.student.profile_image else None
+                'average_score': entry.percentage,
+                'profile_image': entry.profile_image
             })
         
         serializer = LeaderboardSerializer(leaderboard_data, many=True)
@@ -546,6 +767,7 @@ class LeaderboardViewSet(viewsets.ViewSet):
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPagination
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -553,13 +775,57 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], url_path='mark-read')
     def mark_read(self, request):
         notification_ids = request.data.get('notification_ids', [])
-        Notification.objects.filter(id__in=notification_ids, user=request.user).update(is_read=True)
-        return Response({'message': 'Notifications marked as read'})
+        mark_read(request.user, notification_ids)
+        return Response({'message': 'Notifications marked as read', 'unread_count': unread_count(request.user.pk)})
     
     @action(detail=False, methods=['post'], url_path='mark-all-read')
     def mark_all_read(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
-        return Response({'message': 'All notifications marked as read'})
+        mark_read(request.user)
+        return Response({'message': 'All notifications marked as read', 'unread_count': 0})
+    
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread_count': unread_count(request.user.pk)})
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
+    def broadcast(self, request):
+        """Queue one notification for every active user of a role, or for user_ids."""
+        title = request.data.get('title')
+        message = request.data.get('message')
+        notification_type = request.data.get('notification_type', 'exam_scheduled')
+        valid_types = dict(Notification.NOTIFICATION_TYPE_CHOICES)
+        if not title or not message or notification_type not in valid_types:
+            return Response(
+                {'detail': f'title, message and a notification_type of {", ".join(valid_types)} are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user_ids = request.data.get('user_ids')
+        if user_ids is not None and not (isinstance(user_ids, list) and all(isinstance(i, int) for i in user_ids)):
+            return Response({'detail': 'user_ids must be a list of user ids'}, status=status.HTTP_400_BAD_REQUEST)
+        job = broadcast(notification_type, title, message, user_ids=user_ids, role=request.data.get('role', 'student'))
+        return Response({'job': job.key if job else None}, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer])
+    def stream(self, request):
+        """Server-Sent Events feed replacing polling for the notification badge.
+
+        Long-lived under ASGI; WSGI servers answer with a single pass instead.
+        """
+        last_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_id')
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            return Response({'detail': 'Invalid last event id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if isinstance(request._request, ASGIRequest):
+            events = notification_stream(request.user, last_id)
+        else:
+            events = notification_snapshot(request.user, last_id)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 class AchievementViewSet(viewsets.ModelViewSet):
     queryset = Achievement.objects.all()
@@ -581,51 +847,3 @@ class AchievementViewSet(viewsets.ModelViewSet):
         achievements = StudentAchievement.objects.filter(student=student)
         serializer = StudentAchievementSerializer(achievements, many=True)
         return Response(serializer.data)
-
-# Helper functions
-def calculate_exam_ranks(exam_id):
-    attempts = ExamAttempt.objects.filter(
-        exam_id=exam_id,
-        status='completed'
-    ).order_by('-score', 'time_spent')
-    
-    for idx, attempt in enumerate(attempts, 1):
-        attempt.rank = idx
-        attempt.save(update_fields=['rank'])
-
-def update_global_ranks():
-    students = Student.objects.all().order_by('-total_points')
-    for idx, student in enumerate(students, 1):
-        student.rank = idx
-        student.save(update_fields=['rank'])
-
-def check_achievements(student):
-    completed_exams = ExamAttempt.objects.filter(student=student, status='completed').count()
-    
-    # Check for achievements
-    achievements_to_award = []
-    
-    # First exam completed
-    if completed_exams == 1:
-        try:
-            achievement = Achievement.objects.get(criteria='complete_first_exam')
-            StudentAchievement.objects.get_or_create(student=student, achievement=achievement)
-        except Achievement.DoesNotExist:
-            pass
-    
-    # 10 exams completed
-    if completed_exams == 10:
-        try:
-            achievement = Achievement.objects.get(criteria='complete_10_exams')
-            StudentAchievement.objects.get_or_create(student=student, achievement=achievement)
-        except Achievement.DoesNotExist:
-            pass
-    
-    # Perfect score
-    perfect_scores = ExamAttempt.objects.filter(student=student, percentage=100).count()
-    if perfect_scores >= 1:
-        try:
-            achievement = Achievement.objects.get(criteria='score_100_percent')
-            StudentAchievement.objects.get_or_create(student=student, achievement=achievement)
-        except Achievement.DoesNotExist:
-            pass
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'api.perf.PerfMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +57,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 DATABASES = {
     'default': {
@@ -64,6 +66,54 @@ DATABASES = {
     }
 }
 
+# SQLITE_PROFILE=production tunes SQLite for one server taking many concurrent
+# submissions: WAL journal (readers never block the writer), fsync only at
+# checkpoints, a 64 MB page cache, memory-mapped reads, a 20 s busy timeout,
+# BEGIN IMMEDIATE transactions and persistent connections
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'default')
+
+if SQLITE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'config.sqlite',
+        'OPTIONS': {'timeout': 20},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    })
+
+# Cache backend: locmem (default, per process), file or db.
+# The db backend needs: python manage.py createcachetable
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mcq-exam-portal',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_cache',
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')],
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Seconds a pre-rendered exam paper stays cached
+EXAM_PAPER_CACHE_TIMEOUT = 3600
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -99,6 +149,13 @@ REST_FRAMEWORK = {
     ),
 }
 
+# List endpoints use cursor pagination; clients may ask for up to
+# MAX_PAGE_SIZE items with ?page_size=
+PAGINATION = {
+    'PAGE_SIZE': int(os.getenv('PAGE_SIZE', '20')),
+    'MAX_PAGE_SIZE': 100,
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -114,3 +171,56 @@ CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
 
 AUTH_USER_MODEL = 'api.User'
+
+# Background job queue (post-submission ranks, points, achievements, notifications).
+# Run workers with: python manage.py run_jobs
+JOB_QUEUE = {
+    'EAGER': os.getenv('JOBS_EAGER', 'False') == 'True',  # run jobs inline right after commit
+    'WORKERS': int(os.getenv('JOB_WORKERS', '4')),
+    'TICK_SECONDS': float(os.getenv('JOB_TICK_SECONDS', '1.0')),
+    'BATCH_SIZE': 200,
+    'MAX_TRIES': 5,
+    'LEASE_SECONDS': 300,
+}
+
+# Exam WebSockets (ws/attempts/<id>/). The in-memory layer only reaches sockets
+# of the same process; run several ASGI workers with CHANNEL_LAYER=redis
+# (needs channels-redis and REDIS_URL).
+CHANNEL_LAYER_BACKENDS = {
+    'memory': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+    'redis': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')]},
+    },
+}
+
+CHANNEL_LAYERS = {
+    'default': CHANNEL_LAYER_BACKENDS[os.getenv('CHANNEL_LAYER', 'memory')],
+}
+
+EXAM_CHANNEL = {
+    'TICK_SECONDS': int(os.getenv('EXAM_TICK_SECONDS', '5')),  # server timer sync interval
+    'HEARTBEAT_TIMEOUT': 60,  # close sockets whose client went quiet
+}
+
+# Notification fan-out chunks, cached unread counters and the Server-Sent Events
+# feed at /api/notifications/stream/
+NOTIFICATIONS = {
+    'FANOUT_CHUNK_SIZE': 1000,
+    'UNREAD_CACHE_SECONDS': 24 * 60 * 60,
+    'STREAM_SECONDS': int(os.getenv('NOTIFICATION_STREAM_SECONDS', '300')),  # clients reconnect after this
+    'STREAM_POLL_SECONDS': 2.0,  # cache reads between events
+    'STREAM_RESYNC_SECONDS': 30.0,  # database check when the cache is per-process
+    'STREAM_HEARTBEAT_SECONDS': 15.0,
+    'RECONNECT_SECONDS': 15.0,  # between single-pass responses under WSGI
+}
+
+# Request instrumentation: Server-Timing headers and per-endpoint stats at
+# /api/_perf for a random SAMPLE_RATE share of requests
+PERF = {
+    'ENABLED': os.getenv('PERF_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.getenv('PERF_SAMPLE_RATE', '0.1')),
+    'WINDOW': 1000,  # latest samples kept per endpoint
+}
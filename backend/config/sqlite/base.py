@@ -0,0 +1,20 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend for concurrent writers.
+
+    Applies the PRAGMAS from the database settings to every new connection
+    and opens transactions with BEGIN IMMEDIATE, so a transaction that will
+    write waits for the lock (up to the busy timeout) when it starts instead
+    of failing with "database is locked" when it tries to upgrade.
+    """
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
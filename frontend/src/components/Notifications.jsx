@@ -9,8 +9,58 @@ const Notifications = () => {
 
   useEffect(() => {
     fetchNotifications();
-    const interval = setInterval(fetchNotifications, 30000); // Refresh every 30 seconds
-    return () => clearInterval(interval);
+
+    // New notifications and the unread badge are pushed by the server. Read
+    // with fetch rather than EventSource so the token travels in a header.
+    const controller = new AbortController();
+    let lastEventId = null;
+    let retry = 3000;
+
+    const handleEvent = (block) => {
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+        else if (line.startsWith('id: ')) lastEventId = line.slice(4);
+        else if (line.startsWith('retry: ')) retry = Number(line.slice(7));
+      });
+      if (event === 'notification') {
+        const notification = JSON.parse(data);
+        setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+      } else if (event === 'unread') {
+        setUnreadCount(JSON.parse(data).unread_count);
+      }
+    };
+
+    const listen = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const headers = { Authorization: `Bearer ${localStorage.getItem('token')}` };
+          if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+          const response = await fetch('http://127.0.0.1:8000/api/notifications/stream/', {
+            headers,
+            signal: controller.signal,
+          });
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            const blocks = buffer.split('\n\n');
+            buffer = blocks.pop();
+            blocks.forEach(handleEvent);
+          }
+        } catch (error) {
+          if (controller.signal.aborted) return;
+        }
+        await new Promise(resolve => setTimeout(resolve, retry));
+      }
+    };
+
+    listen();
+    return () => controller.abort();
   }, []);
 
   const fetchNotifications = async () => {
@@ -19,8 +69,7 @@ const Notifications = () => {
       const response = await axios.get('http://127.0.0.1:8000/api/notifications/', {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setNotifications(response.data);
-      setUnreadCount(response.data.filter(n => !n.is_read).length);
+      setNotifications(response.data.results);
     } catch (error) {
       console.error('Error fetching notifications:', error);
     }
@@ -29,12 +78,13 @@ const Notifications = () => {
   const markAsRead = async (notificationId) => {
     try {
       const token = localStorage.getItem('token');
-      await axios.post(
+      const response = await axios.post(
         'http://127.0.0.1:8000/api/notifications/mark-read/',
         { notification_ids: [notificationId] },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchNotifications();
+      setNotifications(prev => prev.map(n => (n.id === notificationId ? { ...n, is_read: true } : n)));
+      setUnreadCount(response.data.unread_count);
     } catch (error) {
       console.error('Error marking notification as read:', error);
     }
@@ -48,7 +98,8 @@ const Notifications = () => {
         {},
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      fetchNotifications();
+      setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+      setUnreadCount(0);
     } catch (error) {
       console.error('Error marking all as read:', error);
     }
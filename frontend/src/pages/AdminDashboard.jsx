@@ -14,8 +14,8 @@ const AdminDashboard = () => {
 
   const fetchExams = async () => {
     try {
-      const response = await axios.get('/api/exams')
-      setExams(response.data)
+      const response = await axios.get('/api/exams/?page_size=100')
+      setExams(response.data.results)
     } catch (error) {
       console.error('Error fetching exams:', error)
     } finally {
@@ -23,26 +23,26 @@ const Dashboard = () => {
     try {
       const token = localStorage.getItem('token')
       const [examsRes, attemptsRes] = await Promise.all([
-        axios.get('http://127.0.0.1:8000/api/exams/', {
+        axios.get('http://127.0.0.1:8000/api/exams/?page_size=100', {
           headers: { Authorization: `Bearer ${token}` }
         }),
-        axios.get('http://127.0.0.1:8000/api/students/my-attempts/', {
+        axios.get('http://127.0.0.1:8000/api/students/my-attempts/?page_size=100', {
           headers: { Authorization: `Bearer ${token}` }
         })
       ])
 
-      const completedAttempts = attemptsRes.data.filter(a => a.status === 'completed')
+      const completedAttempts = attemptsRes.data.results.filter(a => a.status === 'completed')
       const avgScore = completedAttempts.length > 0
         ? completedAttempts.reduce((sum, a) => sum + (a.score || 0), 0) / completedAttempts.length
         : 0
 
       setStats({
-        totalExams: examsRes.data.length,
+        totalExams: examsRes.data.results.length,
         completedExams: completedAttempts.length,
         averageScore: avgScore.toFixed(1)
       })
 
-      setRecentAttempts(attemptsRes.data.slice(0, 5))
+      setRecentAttempts(attemptsRes.data.results.slice(0, 5))
     } catch (error) {
       console.error('Error fetching dashboard data:', error)
     } finally {
@@ -15,10 +15,10 @@ const ExamList = () => {
   const fetchExams = async () => {
     try {
       const token = localStorage.getItem('token')
-      const response = await axios.get('http://127.0.0.1:8000/api/exams/', {
+      const response = await axios.get('http://127.0.0.1:8000/api/exams/?page_size=100', {
         headers: { Authorization: `Bearer ${token}` }
       })
-      setExams(response.data)
+      setExams(response.data.results)
     } catch (error) {
       console.error('Error fetching exams:', error)
     } finally {
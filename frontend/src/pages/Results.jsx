@@ -14,10 +14,10 @@ const Results = () => {
   const fetchResults = async () => {
     try {
       const token = localStorage.getItem('token')
-      const response = await axios.get('http://127.0.0.1:8000/api/students/my-attempts/', {
+      const response = await axios.get('http://127.0.0.1:8000/api/students/my-attempts/?page_size=100', {
         headers: { Authorization: `Bearer ${token}` }
       })
-      const completed = response.data.filter(a => a.status === 'completed')
+      const completed = response.data.results.filter(a => a.status === 'completed')
       setAttempts(completed)
     } catch (error) {
       console.error('Error fetching results:', error)
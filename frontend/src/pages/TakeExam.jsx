@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import Navbar from '../components/Navbar'
 import axios from 'axios'
@@ -13,16 +13,48 @@ const TakeExam = () => {
   const [timeLeft, setTimeLeft] = useState(0)
   const [loading, setLoading] = useState(true)
   const [submitting, setSubmitting] = useState(false)
+  const socketRef = useRef(null)
 
   useEffect(() => {
     startExam()
   }, [examId])
 
+  // The server owns the clock: ticks correct the countdown, answers are
+  // autosaved over the socket and the server submits when time is up
+  useEffect(() => {
+    if (!attemptId) return
+    const token = localStorage.getItem('token')
+    const socket = new WebSocket(`ws://127.0.0.1:8000/ws/attempts/${attemptId}/`, ['bearer', token])
+    const heartbeat = setInterval(() => {
+      if (socket.readyState === WebSocket.OPEN) socket.send(JSON.stringify({ type: 'heartbeat' }))
+    }, 20000)
+
+    socket.onopen = () => { socketRef.current = socket }
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data)
+      if (message.remaining_seconds !== undefined) {
+        setTimeLeft(message.remaining_seconds)
+      }
+      if (message.type === 'submitted') {
+        alert(message.reason === 'time_up' ? 'Time is up, your exam was submitted.' : 'Exam submitted successfully!')
+        navigate('/results')
+      }
+    }
+    socket.onclose = () => {
+      if (socketRef.current === socket) socketRef.current = null
+    }
+
+    return () => {
+      clearInterval(heartbeat)
+      socket.close()
+    }
+  }, [attemptId])
+
   useEffect(() => {
     if (timeLeft > 0) {
       const timer = setTimeout(() => setTimeLeft(timeLeft - 1), 1000)
       return () => clearTimeout(timer)
-    } else if (timeLeft === 0 && exam) {
+    } else if (timeLeft === 0 && exam && !socketRef.current) {
       handleSubmit()
     }
   }, [timeLeft])
@@ -57,6 +89,12 @@ const TakeExam = () => {
       ...answers,
       [questionId]: answer
     })
+    if (socketRef.current) {
+      socketRef.current.send(JSON.stringify({
+        type: 'answers',
+        answers: [{ question_id: questionId, selected_answer: answer }]
+      }))
+    }
   }
 
   const handleSubmit = async () => {
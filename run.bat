@@ -22,6 +22,9 @@ echo.
 echo Starting Django Backend Server...
 start cmd /k "cd backend && python manage.py runserver"
 
+echo Starting Background Job Worker...
+start cmd /k "cd backend && python manage.py run_jobs"
+
 timeout /t 3
 
 echo Starting Frontend Server...